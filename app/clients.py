@@ -0,0 +1,30 @@
+"""Process-wide GraphClient / OpenAIClient instances, created lazily on first use.
+
+Reusing one instance keeps the MSAL app (and its in-memory token cache) and the
+OpenAI SDK connection pool alive across commands run in the same process.
+A failed construction (missing config) is not cached, so it is retried next call.
+The client modules (msal, requests, openai) are imported on first use, not at import time.
+"""
+
+import functools
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.graph_client import GraphClient
+    from app.openai_client import OpenAIClient
+
+
+@functools.lru_cache(maxsize=1)
+def get_graph() -> "GraphClient":
+    """Shared GraphClient. Raises GraphClientError if Graph config is missing."""
+    from app.graph_client import GraphClient
+
+    return GraphClient()
+
+
+@functools.lru_cache(maxsize=1)
+def get_openai() -> "OpenAIClient":
+    """Shared OpenAIClient using the configured deployment. Raises ConfigError if the API key is missing."""
+    from app.openai_client import OpenAIClient
+
+    return OpenAIClient()
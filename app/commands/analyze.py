@@ -1,59 +1,80 @@
 """AI-driven Graph analysis commands: analyze-user, analyze-device, audit-intune."""
 
-import json
-from pathlib import Path
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
 from app.config import ConfigError
-from app.graph_client import GraphClient, GraphClientError, _is_403, _safe_graph
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
+from app.util.json_fast import dumps_str
 
 console = Console()
 
 PERMISSION_MSG = "Insufficient Graph API permissions to perform this action. Contact admin."
 
+# analyze-user stops paging devices after this many matches (only the first 20 are sent to the AI).
+MAX_USER_DEVICE_MATCHES = 100
+
 
 def analyze_user_cmd(
     user: str = typer.Argument(..., help="User principal name, display name, or identifier to look up."),
     top: int = typer.Option(100, "--top", help="Max devices/users to fetch for lookup."),
 ) -> None:
     """Fetch user and device data from Graph, then produce an AI summary report."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from app.clients import get_graph, get_openai
+    from app.graph_client import GraphClientError, _safe_graph
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
+    user_lower = user.lower()
+    matching: list[dict] = []
+
+    def _collect_matching() -> list[dict]:
+        # Stream device pages and stop once enough matches are found; remaining pages are never fetched.
+        for d in graph.iter_managed_devices(top=min(top, 10000)):
+            if (
+                user_lower in (d.get("userPrincipalName") or "").lower()
+                or user_lower in (d.get("userDisplayName") or "").lower()
+                or user == d.get("id", "")
+            ):
+                matching.append(d)
+                if len(matching) >= MAX_USER_DEVICE_MATCHES:
+                    break
+        return matching
+
+    # Users and devices are independent; fetch both concurrently. Separate limitation lists keep
+    # the user-lookup check below scoped to the users call.
+    user_limitations: list[str] = []
+    device_limitations: list[str] = []
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_users = ex.submit(_safe_graph, graph.get_users, top=top, default={}, limitations=user_limitations)
+        f_devices = ex.submit(_safe_graph, _collect_matching, default=matching, limitations=device_limitations)
+        users_data = f_users.result()
+        f_devices.result()
+    limitations.extend(user_limitations)
+    limitations.extend(device_limitations)
+
     user_info: dict | None = None
-    users_data = _safe_graph(lambda: graph.get_users(top=top), default={}, limitations=limitations)
-    if users_data and not limitations:
+    if users_data and not user_limitations:
         value = users_data.get("value") or []
         for u in value:
             upn = (u.get("userPrincipalName") or "").lower()
             disp = (u.get("displayName") or "").lower()
-            if user.lower() in upn or user.lower() in disp or user == u.get("id", ""):
+            if user_lower in upn or user_lower in disp or user == u.get("id", ""):
                 user_info = u
                 break
 
-    devices_data = _safe_graph(
-        lambda: graph.get_managed_devices(top=min(top, 10000)),
-        default={"value": []},
-        limitations=limitations,
-    )
-    devices = (devices_data or {}).get("value") or []
-    user_lower = user.lower()
-    matching = [
-        d for d in devices
-        if user_lower in (d.get("userPrincipalName") or "").lower()
-        or user_lower in (d.get("userDisplayName") or "").lower()
-        or user == d.get("id", "")
-    ]
-
     payload = {
         "query_user": user,
         "user_info": user_info,
@@ -65,9 +86,9 @@ def analyze_user_cmd(
         payload["limitation_note"] = PERMISSION_MSG
 
     try:
-        system_prompt = _load_prompt("analyze_user")
-        ai = OpenAIClient()
-        summary = ai.generate_response(system_prompt, json.dumps(payload, default=str, indent=2))
+        system_prompt = load_prompt("analyze_user")
+        ai = get_openai()
+        summary = ai.generate_response(system_prompt, dumps_str(payload))
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -98,17 +119,20 @@ def analyze_device_cmd(
     device_id: str = typer.Argument(..., help="Intune managed device ID."),
 ) -> None:
     """Fetch a single managed device from Graph and produce an AI executive summary."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from app.clients import get_graph, get_openai
+    from app.graph_client import GraphClientError, _safe_graph
+    from app.openai_client import OpenAIClientError
+
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
     limitations: list[str] = []
-    device = _safe_graph(
-        lambda: graph.get_managed_device(device_id),
-        default=None,
-        limitations=limitations,
-    )
+    device = _safe_graph(graph.get_managed_device, device_id, default=None, limitations=limitations)
     if device is None:
         if limitations and any("403" in m for m in limitations):
             console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
@@ -117,9 +141,9 @@ def analyze_device_cmd(
         raise typer.Exit(1)
 
     try:
-        system_prompt = _load_prompt("analyze_device")
-        ai = OpenAIClient()
-        summary = ai.generate_response(system_prompt, json.dumps(device, default=str, indent=2))
+        system_prompt = load_prompt("analyze_device")
+        ai = get_openai()
+        summary = ai.generate_response(system_prompt, dumps_str(device))
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -141,37 +165,49 @@ def audit_intune_cmd(
     top: int = typer.Option(100, "--top", help="Max devices, apps, and configs to fetch."),
 ) -> None:
     """Aggregate Intune devices, apps, and configurations; produce an AI audit summary."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from app.clients import get_graph, get_openai
+    from app.graph_client import GraphClientError, _safe_graph
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
-    devices_data = _safe_graph(lambda: graph.get_managed_devices(top=top), default={"value": []}, limitations=limitations)
+    # Three independent I/O-bound Graph calls: run them concurrently so latency is the slowest call, not the sum.
+    # One limitation list per call, merged in a fixed order, so the AI payload does not depend on thread timing.
+    calls = (graph.get_managed_devices, graph.get_mobile_apps, graph.get_device_configurations)
+    call_limitations: tuple[list[str], ...] = ([], [], [])
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        futures = [
+            ex.submit(_safe_graph, call, top=top, default={"value": []}, limitations=lims)
+            for call, lims in zip(calls, call_limitations)
+        ]
+        devices_data, apps_data, configs_data = (f.result() for f in futures)
+    for lims in call_limitations:
+        limitations.extend(lims)
     devices = devices_data.get("value") or []
-
-    apps_data = _safe_graph(lambda: graph.get_mobile_apps(top=top), default={"value": []}, limitations=limitations)
     apps = apps_data.get("value") or []
-
-    configs_data = _safe_graph(lambda: graph.get_device_configurations(top=top), default={"value": []}, limitations=limitations)
     configs = configs_data.get("value") or []
 
     # Build rich payload for AI: top apps, config list, device breakdown by OS/compliance
     app_summary = [{"displayName": a.get("displayName"), "@odata.type": a.get("@odata.type")} for a in apps[:50]]
     config_summary = [{"displayName": c.get("displayName"), "id": c.get("id")} for c in configs[:50]]
-    os_counts: dict[str, int] = {}
-    compliance_counts: dict[str, int] = {}
-    for d in devices:
-        os_name = d.get("operatingSystem") or "Unknown"
-        os_counts[os_name] = os_counts.get(os_name, 0) + 1
-        comp = d.get("complianceState") or "unknown"
-        compliance_counts[comp] = compliance_counts.get(comp, 0) + 1
+    os_counts = dict(Counter(d.get("operatingSystem") or "Unknown" for d in devices))
+    compliance_counts = dict(Counter(d.get("complianceState") or "unknown" for d in devices))
+    device_count, app_count, config_count = len(devices), len(apps), len(configs)
+    # Only counts and samples are needed from here on; drop the raw Graph lists before the slow LLM round trip.
+    del devices_data, apps_data, configs_data, devices, apps, configs
 
     payload = {
-        "managed_devices_count": len(devices),
-        "mobile_apps_count": len(apps),
-        "device_configurations_count": len(configs),
+        "managed_devices_count": device_count,
+        "mobile_apps_count": app_count,
+        "device_configurations_count": config_count,
         "devices_by_os": os_counts,
         "devices_by_compliance": compliance_counts,
         "mobile_apps_sample": app_summary,
@@ -182,9 +218,9 @@ def audit_intune_cmd(
         payload["limitation_note"] = PERMISSION_MSG
 
     try:
-        system_prompt = _load_prompt("audit_intune")
-        ai = OpenAIClient()
-        summary = ai.generate_response(system_prompt, json.dumps(payload, default=str, indent=2))
+        system_prompt = load_prompt("audit_intune")
+        ai = get_openai()
+        summary = ai.generate_response(system_prompt, dumps_str(payload))
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -195,9 +231,9 @@ def audit_intune_cmd(
     table = Table(title="Intune audit counts")
     table.add_column("Resource", style="cyan")
     table.add_column("Count", style="green")
-    table.add_row("Managed devices", str(len(devices)))
-    table.add_row("Mobile apps", str(len(apps)))
-    table.add_row("Device configurations", str(len(configs)))
+    table.add_row("Managed devices", str(device_count))
+    table.add_row("Mobile apps", str(app_count))
+    table.add_row("Device configurations", str(config_count))
     console.print(table)
     if limitations:
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
@@ -208,14 +244,21 @@ def list_apps_cmd(
     top: int = typer.Option(100, "--top", help="Max mobile apps to fetch."),
 ) -> None:
     """List Intune mobile apps with an AI summary (deployment coverage, gaps)."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from app.clients import get_graph, get_openai
+    from app.graph_client import GraphClientError, _safe_graph
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
-    apps_data = _safe_graph(lambda: graph.get_mobile_apps(top=top), default={"value": []}, limitations=limitations)
+    apps_data = _safe_graph(graph.get_mobile_apps, top=top, default={"value": []}, limitations=limitations)
     apps = apps_data.get("value") or []
 
     payload = {"mobile_apps_count": len(apps), "mobile_apps": apps[:50], "limitations": limitations}
@@ -223,9 +266,9 @@ def list_apps_cmd(
         payload["limitation_note"] = PERMISSION_MSG
 
     try:
-        system_prompt = _load_prompt("list_apps")
-        ai = OpenAIClient()
-        summary = ai.generate_response(system_prompt, json.dumps(payload, default=str, indent=2))
+        system_prompt = load_prompt("list_apps")
+        ai = get_openai()
+        summary = ai.generate_response(system_prompt, dumps_str(payload))
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -248,15 +291,22 @@ def list_configs_cmd(
     top: int = typer.Option(100, "--top", help="Max device configurations to fetch."),
 ) -> None:
     """List Intune device configurations with an AI summary (coverage, gaps)."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from app.clients import get_graph, get_openai
+    from app.graph_client import GraphClientError, _safe_graph
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
     configs_data = _safe_graph(
-        lambda: graph.get_device_configurations(top=top), default={"value": []}, limitations=limitations
+        graph.get_device_configurations, top=top, default={"value": []}, limitations=limitations
     )
     configs = configs_data.get("value") or []
 
@@ -265,9 +315,9 @@ def list_configs_cmd(
         payload["limitation_note"] = PERMISSION_MSG
 
     try:
-        system_prompt = _load_prompt("list_configs")
-        ai = OpenAIClient()
-        summary = ai.generate_response(system_prompt, json.dumps(payload, default=str, indent=2))
+        system_prompt = load_prompt("list_configs")
+        ai = get_openai()
+        summary = ai.generate_response(system_prompt, dumps_str(payload))
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -1,20 +1,17 @@
 """analyze-log command: intelligent log analysis with AI (Phase 11)."""
 
-import json
 import re
-from collections import Counter
-from datetime import datetime
+from collections import Counter, deque
 from pathlib import Path
 from typing import Literal
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
-from rich.rule import Rule
-from rich.table import Table
 
 from app.config import ConfigError, get_config
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
+from app.util.json_fast import dumps_str
+from app.util.report_io import report_path
 
 console = Console()
 
@@ -46,6 +43,28 @@ SUSPICIOUS_PATTERNS = [
     ("memory exhausted", re.compile(r"memory.*(?:exhausted|out of memory)|(?:exhausted|out of memory)", re.I)),
 ]
 
+_LEVEL_ERR = re.compile(r"\b(?:ERROR|Error|error|CRITICAL|FATAL)\b")
+_LEVEL_WARN = re.compile(r"\b(?:WARNING|Warning|WARN)\b")
+# One alternation over all suspicious patterns; group gN maps back to SUSPICIOUS_PATTERNS[N].
+_SUSP_UNION = re.compile(
+    "|".join(f"(?P<g{i}>{pat.pattern})" for i, (_, pat) in enumerate(SUSPICIOUS_PATTERNS)),
+    re.I,
+)
+_SUSP_NAMES = [name for name, _ in SUSPICIOUS_PATTERNS]
+
+# Leading ISO timestamp, then leading syslog timestamp, each optional: one sub() equals the two
+# anchored subs applied in sequence.
+_TS_STRIP = re.compile(
+    r"^\s*(?:\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2}(?:\.\d+)?\s*)?"
+    rf"(?:{SYSLOG_MONTHS}\s+\d{{1,2}}\s+\d{{1,2}}:\d{{2}}:\d{{2}}\S*\s*)?",
+    re.I,
+)
+# First characters a leading timestamp can start with (digit or month initial, any case).
+_TS_LEAD_CHARS = frozenset("0123456789JFMASONDjfmasond")
+
+_MARKUP_RE = re.compile(r"\[/?[^\]]*\]")
+_SECTION_RE = re.compile(r"^##\s+(.+)$", re.MULTILINE)
+
 SEVERITY_STYLES = {
     "Critical": "bold red",
     "High": "bold yellow",
@@ -55,55 +74,59 @@ SEVERITY_STYLES = {
 }
 
 
-def _load_prompt(name: str) -> str:
-    """Load prompt from app/prompts/{name}.txt."""
-    prompts_dir = Path(__file__).resolve().parent.parent / "prompts"
-    return (prompts_dir / f"{name}.txt").read_text(encoding="utf-8").strip()
-
-
 def _read_and_preprocess(
     file_path: Path,
     log_type: LogTypeHint,
     top: int,
 ) -> tuple[list[str], str]:
     """
-    Validate file, read lines, strip blanks, detect type if auto, return last `top` lines.
+    Validate file, stream lines, strip blanks, detect type if auto, return last `top` lines.
     Returns (lines, detected_type). Exits with red error if file missing/unreadable.
+    Memory is bounded by `top` (plus a 50-line head sample), not by file size.
     """
     if not file_path.exists():
         console.print(f"[red]File not found: {file_path}[/red]")
         raise typer.Exit(1)
+
+    head: list[str] = []
+    tail: deque[str] = deque(maxlen=top if top > 0 else None)
     try:
-        content = file_path.read_text(encoding="utf-8", errors="ignore")
+        with file_path.open("r", encoding="utf-8", errors="ignore") as fh:
+            for ln in fh:
+                s = ln.strip()
+                if not s:
+                    continue
+                if len(head) < 50:
+                    head.append(s)
+                tail.append(s)
     except OSError as e:
         console.print(f"[red]Cannot read file: {file_path} — {e}[/red]")
         raise typer.Exit(1)
 
-    all_lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
-    if not all_lines:
+    if not head:
         return [], "generic"
 
     if log_type != "auto":
         detected = log_type
     else:
-        sample = " ".join(all_lines[:50])
+        sample = " ".join(head)
         if any(kw in sample for kw in INTRUNE_KEYWORDS):
             detected = "intune"
-        elif any(SYSLOG_PATTERN.search(ln) for ln in all_lines[:50]):
+        elif any(SYSLOG_PATTERN.search(ln) for ln in head):
             detected = "syslog"
         else:
             detected = "generic"
 
-    result_lines = all_lines[-top:] if len(all_lines) > top else all_lines
-    return result_lines, detected
+    return list(tail), detected
 
 
 def _normalize_for_repeat(line: str) -> str:
-    """Strip common leading timestamp patterns to normalize for repeated-message counting."""
-    s = line
-    s = re.sub(r"^\s*\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2}(?:\.\d+)?\s*", "", s)
-    s = re.sub(r"^\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{1,2}:\d{2}:\d{2}[^\s]*\s*", "", s, flags=re.I)
-    return s.strip() or line
+    """Strip common leading timestamp patterns (ISO, then syslog) to normalize for repeated-message counting."""
+    s = line.lstrip()
+    # Timestamps start with a digit or a month initial; most message lines start with neither, so skip the regex.
+    if not s or s[0] not in _TS_LEAD_CHARS:
+        return s.rstrip() or line
+    return _TS_STRIP.sub("", s, count=1).strip() or line
 
 
 def _prescan_log(lines: list[str], detected_type: str) -> dict:
@@ -113,24 +136,31 @@ def _prescan_log(lines: list[str], detected_type: str) -> dict:
     """
     error_count = 0
     warning_count = 0
+    suspicious_hits: set[str] = set()
+    all_suspicious = len(SUSPICIOUS_PATTERNS)
     for ln in lines:
-        if re.search(r"\b(ERROR|Error|error|CRITICAL|FATAL)\b", ln):
+        if _LEVEL_ERR.search(ln):
             error_count += 1
-        if re.search(r"\b(WARNING|Warning|WARN)\b", ln):
+        if _LEVEL_WARN.search(ln):
             warning_count += 1
+        # Membership only: once every pattern has been seen, skip the suspicious scan for remaining lines.
+        if len(suspicious_hits) == all_suspicious:
+            continue
+        m = _SUSP_UNION.search(ln)
+        if m:
+            suspicious_hits.add(_SUSP_NAMES[int(m.lastgroup[1:])])
+            # The union reports only the leftmost match; check the remaining patterns on this (rare) hit line.
+            for name, pat in SUSPICIOUS_PATTERNS:
+                if name not in suspicious_hits and pat.search(ln):
+                    suspicious_hits.add(name)
 
     repeated_messages: list[str] = []
     if lines:
-        normalized = [_normalize_for_repeat(ln) for ln in lines if ln.strip()]
-        if normalized:
-            counts = Counter(normalized)
-            for msg, _ in counts.most_common(3):
-                repeated_messages.append(msg[:80] + ("..." if len(msg) > 80 else ""))
+        counts = Counter(_normalize_for_repeat(ln) for ln in lines if ln.strip())
+        for msg, _ in counts.most_common(3):
+            repeated_messages.append(msg[:80] + ("..." if len(msg) > 80 else ""))
 
-    suspicious_patterns: list[str] = []
-    for name, pat in SUSPICIOUS_PATTERNS:
-        if any(pat.search(ln) for ln in lines):
-            suspicious_patterns.append(name)
+    suspicious_patterns = [name for name in _SUSP_NAMES if name in suspicious_hits]
 
     time_range: str | None = None
     if lines:
@@ -161,9 +191,11 @@ def _extract_overall_severity(severity_section_text: str) -> str:
 
 def _parse_sections(ai_text: str) -> list[tuple[str, str]]:
     """Parse AI response by splitting on ## SectionName. Returns list of (title, content)."""
+    if "##" not in ai_text:  # plain prose: no section headers to find
+        text = ai_text.strip()
+        return [("Report", text)] if text else []
     sections: list[tuple[str, str]] = []
-    pattern = re.compile(r"^##\s+(.+)$", re.MULTILINE)
-    matches = list(pattern.finditer(ai_text))
+    matches = list(_SECTION_RE.finditer(ai_text))
     for i, m in enumerate(matches):
         title = m.group(1).strip()
         start = m.end()
@@ -196,6 +228,10 @@ def _render_output(
     model_name: str,
 ) -> None:
     """Header rule, severity badge, prescan table, five panels, footer."""
+    from rich.panel import Panel
+    from rich.rule import Rule
+    from rich.table import Table
+
     console.print(Rule(f"Log Analysis: {filename}", style="blue"))
 
     badge_style = SEVERITY_STYLES.get(severity, SEVERITY_STYLES["Unknown"])
@@ -224,7 +260,7 @@ def _render_output(
 
 def _strip_rich_markup(text: str) -> str:
     """Remove Rich-style markup for plain-text save."""
-    return re.sub(r"\[/?[^\]]*\]", "", text)
+    return text if "[" not in text else _MARKUP_RE.sub("", text)
 
 
 def _save_report(
@@ -235,15 +271,12 @@ def _save_report(
     lines_count: int,
 ) -> Path:
     """Write plain-text report to reports/analyze_log_YYYYMMDD_HHMMSS.txt."""
-    reports_dir = Path("reports")
-    reports_dir.mkdir(exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = reports_dir / f"analyze_log_{ts}.txt"
-    header = f"Log Analysis Report\nSeverity: {severity}\nLog type: {detected_type}\nLines analyzed: {lines_count}\n"
-    header += f"Errors: {prescan.get('error_count', 0)} | Warnings: {prescan.get('warning_count', 0)}\n"
-    header += f"Time range: {prescan.get('time_range') or '—'}\n\n"
-    body = _strip_rich_markup(ai_text)
-    out_path.write_text(header + body, encoding="utf-8")
+    out_path = report_path("analyze_log")
+    with out_path.open("w", encoding="utf-8") as fh:
+        fh.write(f"Log Analysis Report\nSeverity: {severity}\nLog type: {detected_type}\nLines analyzed: {lines_count}\n")
+        fh.write(f"Errors: {prescan.get('error_count', 0)} | Warnings: {prescan.get('warning_count', 0)}\n")
+        fh.write(f"Time range: {prescan.get('time_range') or '—'}\n\n")
+        fh.write(_strip_rich_markup(ai_text))
     return out_path
 
 
@@ -261,6 +294,9 @@ def analyze_log_cmd(
     top: int = typer.Option(200, "--top", "-n", help="Max number of log lines to send to AI."),
 ) -> None:
     """Analyze a log file with AI: detect patterns, severity, and escalation recommendations."""
+    from app.clients import get_openai
+    from app.openai_client import OpenAIClientError
+
     lines, detected_type = _read_and_preprocess(file, type, top)
 
     if not lines:
@@ -275,11 +311,11 @@ def analyze_log_cmd(
         "prescan_summary": prescan,
         "log_lines": lines,
     }
-    prompt_content = _load_prompt("analyze_log")
-    user_input = json.dumps(payload, default=str, indent=2)
+    prompt_content = load_prompt("analyze_log")
+    user_input = dumps_str(payload)
 
     try:
-        client = OpenAIClient()
+        client = get_openai()
         ai_text = client.generate_response(prompt_content, user_input)
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
@@ -6,15 +6,14 @@ from pathlib import Path
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
-from rich.rule import Rule
-from rich.table import Table
 
 from app.config import ConfigError, get_config
-from app.graph_client import ENDPOINT_REGISTRY, GraphClient, GraphClientError
+from app.util.report_io import report_path
 
 console = Console()
 
+_MARKUP_RE = re.compile(r"\[/?[^\]]*\]")
+
 
 def _short_endpoint(endpoint: str) -> str:
     """Short display for endpoint (last path segment or truncated)."""
@@ -25,7 +24,7 @@ def _short_endpoint(endpoint: str) -> str:
 
 def _strip_rich_markup(text: str) -> str:
     """Remove Rich-style markup for plain-text save."""
-    return re.sub(r"\[/?[^\]]*\]", "", text)
+    return text if "[" not in text else _MARKUP_RE.sub("", text)
 
 
 def _save_report(
@@ -35,15 +34,12 @@ def _save_report(
     tenant_preview: str,
 ) -> Path:
     """Write plain-text report to reports/check_permissions_YYYYMMDD_HHMMSS.txt."""
-    reports_dir = Path("reports")
-    reports_dir.mkdir(exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = reports_dir / f"check_permissions_{ts}.txt"
-    lines = ["Graph Permission Check", "", "Permission Area\tEndpoint\tStatus\tNotes", ""]
-    for area, endpoint, status, notes in rows:
-        lines.append(f"{area}\t{_short_endpoint(endpoint)}\t{_strip_rich_markup(status)}\t{notes}")
-    lines.extend(["", summary, "", f"Probed at {timestamp} | Tenant: {tenant_preview}"])
-    out_path.write_text("\n".join(lines), encoding="utf-8")
+    out_path = report_path("check_permissions")
+    with out_path.open("w", encoding="utf-8") as fh:
+        fh.write("Graph Permission Check\n\nPermission Area\tEndpoint\tStatus\tNotes\n\n")
+        for area, endpoint, status, notes in rows:
+            fh.write(f"{area}\t{_short_endpoint(endpoint)}\t{_strip_rich_markup(status)}\t{notes}\n")
+        fh.write(f"\n{summary}\n\nProbed at {timestamp} | Tenant: {tenant_preview}")
     return out_path
 
 
@@ -58,8 +54,15 @@ def check_permissions_cmd(
     save: bool = typer.Option(False, "--save", help="Save report to reports/check_permissions_<timestamp>.txt."),
 ) -> None:
     """Probe all registered Graph endpoints and display availability (200), denied (403), or error."""
+    from rich.panel import Panel
+    from rich.rule import Rule
+    from rich.table import Table
+
+    from app.clients import get_graph
+    from app.graph_client import ENDPOINT_REGISTRY, GraphClientError
+
     try:
-        client = GraphClient()
+        client = get_graph()
         tenant_id = get_config().azure_tenant_id or ""
         tenant_preview = (tenant_id[:8] + "...") if len(tenant_id) > 8 else (tenant_id or "—")
     except (ConfigError, GraphClientError) as e:
@@ -78,12 +81,12 @@ def check_permissions_cmd(
     available_count = denied_count = error_count = 0
     granted_statuses: list[str] = []
 
-    for i, entry in enumerate(ENDPOINT_REGISTRY):
-        area = entry.get("area", "—")
-        endpoint = entry.get("endpoint", "")
-        status, notes = client.probe_endpoint(entry)
+    results = client.probe_endpoints_batch(ENDPOINT_REGISTRY)
+    for i, (entry, (status, notes)) in enumerate(zip(ENDPOINT_REGISTRY, results)):
+        area = entry.area
+        endpoint = entry.endpoint
 
-        if entry.get("currently_granted"):
+        if entry.currently_granted:
             granted_statuses.append(status)
         if status == "Available":
             status_text = "[green]✓ Available[/green]"
@@ -1,13 +1,14 @@
 """Copilot command: IT assistant for Azure, Intune, PowerShell, etc."""
 
+import re
+import threading
 from pathlib import Path
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
 
 from app.config import ConfigError
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
 
 console = Console()
 
@@ -27,26 +28,22 @@ INTRUNE_KEYWORDS = (
     "managed",
 )
 
+# One case-insensitive scan for any keyword (same substring semantics as `k in prompt.lower()`).
+_INTUNE_KEYWORD_RE = re.compile("|".join(map(re.escape, INTRUNE_KEYWORDS)), re.IGNORECASE)
 
-def _load_prompt(name: str) -> str:
-    """Load prompt from app/prompts/{name}.txt."""
-    prompts_dir = Path(__file__).resolve().parent.parent / "prompts"
-    return (prompts_dir / f"{name}.txt").read_text(encoding="utf-8").strip()
 
-
-def _get_intune_system_context(prompt: str) -> tuple[str, bool]:
+def _get_intune_system_context(use_cache: bool = True) -> tuple[str, bool]:
     """
-    If prompt contains Intune-related keywords, fetch lightweight snapshot and return
-    (context_block, included). If no keyword match or fetch fails, return ("", False).
+    Fetch lightweight Intune snapshot and return (context_block, included); ("", False) if the fetch fails.
+    Only called for prompts matching _INTUNE_KEYWORD_RE.
     """
-    if not any(k in prompt.lower() for k in INTRUNE_KEYWORDS):
-        return "", False
     try:
-        from app.graph_client import GraphClient
+        from app.clients import get_graph
+        from app.graph_cache import get_cached_snapshot
 
-        graph = GraphClient()
+        graph = get_graph()
         limitations: list[str] = []
-        snapshot = graph._build_intune_snapshot(limitations=limitations, top=10000)
+        snapshot = get_cached_snapshot(graph, 10000, limitations, use_cache=use_cache)
         if snapshot is None:
             return "", False
         lines = [
@@ -74,16 +71,51 @@ def copilot_callback(
         help="Save the response to this file (UTF-8).",
         path_type=Path,
     ),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore the cached Intune snapshot and fetch fresh Graph data."),
 ) -> None:
     """Run the IT copilot with the given prompt."""
-    system_prompt = _load_prompt("copilot")
-    intune_context, intune_included = _get_intune_system_context(prompt)
+    from rich.live import Live
+    from rich.panel import Panel
+
+    from app.clients import get_openai
+    from app.openai_client import OpenAIClientError
+
+    # The Graph snapshot fetch (when the prompt is Intune-related) runs in the background while the
+    # prompt is loaded and the OpenAI client is built, and is joined just before the AI call. It is a
+    # daemon thread so a configuration error below exits at once instead of waiting for the fetch.
+    context_result: list[tuple[str, bool]] = []
+    fetch = None
+    if _INTUNE_KEYWORD_RE.search(prompt):
+        fetch = threading.Thread(
+            target=lambda: context_result.append(_get_intune_system_context(use_cache=not no_cache)), daemon=True
+        )
+        fetch.start()
+    system_prompt = load_prompt("copilot")
+    try:
+        client = get_openai()
+    except ConfigError as e:
+        console.print(f"[red]Configuration error: {e}[/red]")
+        raise typer.Exit(1)
+    if fetch is not None:
+        fetch.join()
+    intune_context, intune_included = context_result[0] if context_result else ("", False)
+
+    # The system prompt stays byte-identical across runs (eligible for provider prompt caching); the
+    # tenant snapshot changes, so it goes in a user message ahead of the question instead.
     if intune_context:
-        system_prompt = system_prompt + "\n\n" + intune_context
-    user_input = prompt
+        user_input, instruction = intune_context, prompt
+    else:
+        user_input, instruction = prompt, None
+
+    # Stream the answer into a live panel as it is generated instead of waiting for the full completion.
+    # The live view is transient; the final panel is printed normally so piped output is unchanged.
+    response = ""
     try:
-        client = OpenAIClient()
-        response = client.generate_response(system_prompt, user_input)
+        with Live(console=console, transient=True) as live:
+            for piece in client.stream_response(system_prompt, user_input, instruction=instruction):
+                response += piece
+                live.update(Panel(response, title="AI Copilot Response", border_style="blue"))
+        response = response.strip()
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
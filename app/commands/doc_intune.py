@@ -1,18 +1,15 @@
 """doc-intune command: AI-generated documentation from Intune snapshot (Phase 10: executive, audit, sop, compliance-gap)."""
 
-import json
 import re
-from datetime import datetime
 from pathlib import Path
 from typing import Literal
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
 
 from app.config import ConfigError
-from app.graph_client import GraphClient, GraphClientError
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
+from app.util.report_io import save_report
 
 console = Console()
 
@@ -27,11 +24,8 @@ PROMPT_MAP: dict[ReportType, str] = {
     "compliance-gap": "doc_compliance_gap",
 }
 
-
-def _load_prompt(name: str) -> str:
-    """Load prompt from app/prompts/{name}.txt."""
-    prompts_dir = Path(__file__).resolve().parent.parent / "prompts"
-    return (prompts_dir / f"{name}.txt").read_text(encoding="utf-8").strip()
+_SECTION_RE = re.compile(r"^##\s+(.+)$", re.MULTILINE)
+_MARKUP_RE = re.compile(r"\[/?[^\]]*\]")
 
 
 def _parse_sections(ai_text: str) -> list[tuple[str, str]]:
@@ -39,9 +33,11 @@ def _parse_sections(ai_text: str) -> list[tuple[str, str]]:
     Parse AI response by splitting on lines starting with ##.
     Returns list of (title, content) tuples. Content is stripped; leading/trailing blank lines removed.
     """
+    if "##" not in ai_text:  # plain prose: no section headers to find
+        text = ai_text.strip()
+        return [("Report", text)] if text else []
     sections: list[tuple[str, str]] = []
-    pattern = re.compile(r"^##\s+(.+)$", re.MULTILINE)
-    matches = list(pattern.finditer(ai_text))
+    matches = list(_SECTION_RE.finditer(ai_text))
     for i, m in enumerate(matches):
         title = m.group(1).strip()
         start = m.end()
@@ -55,24 +51,31 @@ def _parse_sections(ai_text: str) -> list[tuple[str, str]]:
 
 def _render_sections(sections: list[tuple[str, str]], border_style: str = "blue") -> None:
     """Render each (title, content) as a Rich panel."""
+    from rich.panel import Panel
+
     for title, content in sections:
         if content:
             console.print(Panel(content, title=title, border_style=border_style))
 
 
+def render_report(ai_text: str, report_type: ReportType) -> None:
+    """Print a doc-intune report: executive as one Executive Summary panel, other types one panel per ## section."""
+    from rich.panel import Panel
+
+    if report_type == "executive":
+        console.print(Panel(ai_text.strip(), title="Executive Summary", border_style="blue"))
+    else:
+        _render_sections(_parse_sections(ai_text), border_style="blue")
+
+
 def _strip_rich_markup(text: str) -> str:
     """Remove Rich/ANSI-style markup so saved file is plain text."""
-    return re.sub(r"\[/?[^\]]*\]", "", text)
+    return text if "[" not in text else _MARKUP_RE.sub("", text)
 
 
 def _save_report(plain_text: str, report_type: ReportType) -> Path:
     """Write plain text to reports/doc_<type>_YYYYMMDD_HHMMSS.txt. Creates reports/ if needed. Returns path."""
-    reports_dir = Path("reports")
-    reports_dir.mkdir(exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = reports_dir / f"doc_{report_type}_{ts}.txt"
-    out_path.write_text(_strip_rich_markup(plain_text), encoding="utf-8")
-    return out_path
+    return save_report(f"doc_{report_type}", _strip_rich_markup(plain_text))
 
 
 def doc_intune_cmd(
@@ -83,16 +86,22 @@ def doc_intune_cmd(
     ),
     save: bool = typer.Option(False, "--save", help="Save output to reports/doc_<type>_<timestamp>.txt."),
     top: int = typer.Option(10000, "--top", help="Max devices, apps, and configs to fetch for snapshot (uses pagination for 3k+)."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore the cached Intune snapshot and fetch fresh Graph data."),
 ) -> None:
     """Generate AI documentation from Intune snapshot. Default --type executive (executive summary)."""
+    from app.clients import get_graph, get_openai
+    from app.graph_cache import get_cached_snapshot, snapshot_payload
+    from app.graph_client import GraphClientError
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
-    snapshot = graph._build_intune_snapshot(limitations=limitations, top=top)
+    snapshot = get_cached_snapshot(graph, top, limitations, use_cache=not no_cache)
     if snapshot is None:
         console.print(
             "[yellow]Graph data unavailable (all endpoints failed or no permission). Cannot generate report.[/yellow]"
@@ -103,11 +112,10 @@ def doc_intune_cmd(
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
 
     prompt_name = PROMPT_MAP[report_type]
-    payload = json.dumps(snapshot, default=str, indent=2)
+    payload = snapshot_payload(snapshot)
     try:
-        system_prompt = _load_prompt(prompt_name)
-        client = OpenAIClient()
-        ai_text = client.generate_response(system_prompt, payload)
+        client = get_openai()
+        ai_text = client.generate_response(load_prompt("intune_analyst"), payload, instruction=load_prompt(prompt_name))
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -115,11 +123,7 @@ def doc_intune_cmd(
         console.print(f"[red]OpenAI / Azure OpenAI error: {e}[/red]")
         raise typer.Exit(1)
 
-    if report_type == "executive":
-        console.print(Panel(ai_text.strip(), title="Executive Summary", border_style="blue"))
-    else:
-        sections = _parse_sections(ai_text)
-        _render_sections(sections, border_style="blue")
+    render_report(ai_text, report_type)
 
     if save:
         out_path = _save_report(ai_text, report_type)
@@ -2,9 +2,6 @@
 
 import typer
 from rich.console import Console
-from rich.table import Table
-
-from app.graph_client import GraphClient, GraphClientError, _safe_graph
 
 console = Console()
 
@@ -20,13 +17,18 @@ def users_cmd(
     top: int = typer.Option(10, "--top", help="Maximum number of users to return."),
 ) -> None:
     """List users from Microsoft Graph."""
+    from rich.table import Table
+
+    from app.clients import get_graph
+    from app.graph_client import GraphClientError, _safe_graph
+
     try:
-        client = GraphClient()
+        client = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
     limitations: list[str] = []
-    data = _safe_graph(lambda: client.get_users(top=top), default={"value": []}, limitations=limitations)
+    data = _safe_graph(client.get_users, top=top, default={"value": []}, limitations=limitations)
     if limitations:
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
 
@@ -53,13 +55,18 @@ def devices_cmd(
     top: int = typer.Option(10, "--top", help="Maximum number of devices to return."),
 ) -> None:
     """List Intune managed devices from Microsoft Graph."""
+    from rich.table import Table
+
+    from app.clients import get_graph
+    from app.graph_client import GraphClientError, _safe_graph
+
     try:
-        client = GraphClient()
+        client = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
     limitations: list[str] = []
-    data = _safe_graph(lambda: client.get_managed_devices(top=top), default={"value": []}, limitations=limitations)
+    data = _safe_graph(client.get_managed_devices, top=top, default={"value": []}, limitations=limitations)
     if limitations:
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
 
@@ -88,13 +95,18 @@ def groups_cmd(
     top: int = typer.Option(10, "--top", help="Maximum number of groups to return."),
 ) -> None:
     """List groups from Microsoft Graph."""
+    from rich.table import Table
+
+    from app.clients import get_graph
+    from app.graph_client import GraphClientError, _safe_graph
+
     try:
-        client = GraphClient()
+        client = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
     limitations: list[str] = []
-    data = _safe_graph(lambda: client.get_groups(top=top), default={"value": []}, limitations=limitations)
+    data = _safe_graph(client.get_groups, top=top, default={"value": []}, limitations=limitations)
     if limitations:
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
 
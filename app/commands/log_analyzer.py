@@ -4,10 +4,10 @@ from pathlib import Path
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
 
 from app.config import ConfigError
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
+from app.util.io_utils import read_head
 
 console = Console()
 
@@ -15,18 +15,9 @@ MAX_FILE_CHARS = 20_000
 TRUNCATE_NOTE = "\n[Log truncated due to size]"
 
 
-def _load_prompt(name: str) -> str:
-    """Load prompt from app/prompts/{name}.txt."""
-    prompts_dir = Path(__file__).resolve().parent.parent / "prompts"
-    return (prompts_dir / f"{name}.txt").read_text(encoding="utf-8").strip()
-
-
 def _read_log_content(log_path: Path) -> str:
-    """Read log file safely; truncate to MAX_FILE_CHARS and append note if needed."""
-    content = log_path.read_text(encoding="utf-8", errors="ignore")
-    if len(content) > MAX_FILE_CHARS:
-        content = content[:MAX_FILE_CHARS] + TRUNCATE_NOTE
-    return content
+    """Read log file safely; read only the first MAX_FILE_CHARS (plus note if truncated)."""
+    return read_head(log_path, MAX_FILE_CHARS, TRUNCATE_NOTE)
 
 
 def log_cmd(
@@ -44,14 +35,19 @@ def log_cmd(
     ),
 ) -> None:
     """Analyze a log file and return structured analysis (root cause, errors, remediation)."""
+    from rich.panel import Panel
+
+    from app.clients import get_openai
+    from app.openai_client import OpenAIClientError
+
     if not log_path.exists():
         console.print(f"[red]File not found: {log_path}[/red]")
         raise typer.Exit(1)
 
     try:
         content = _read_log_content(log_path)
-        system_prompt = _load_prompt("log_analyzer")
-        client = OpenAIClient()
+        system_prompt = load_prompt("log_analyzer")
+        client = get_openai()
         response = client.generate_response(system_prompt, content)
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
@@ -0,0 +1,98 @@
+"""report-pack command: executive summary, remediation suggestions, and trend summary from one Intune snapshot."""
+
+import asyncio
+
+import typer
+from rich.console import Console
+
+from app.commands.doc_intune import render_report
+from app.commands.suggest_fixes import render_fixes
+from app.commands.trend_summary import render_trends
+from app.config import ConfigError
+from app.prompts.loader import load_prompt
+from app.util.report_io import save_report
+
+console = Console()
+
+PERMISSION_MSG = "Insufficient Graph API permissions to perform this action. Contact admin."
+
+# (title, instruction prompt) for each report in the pack, in display order.
+PACK_REPORTS: tuple[tuple[str, str], ...] = (
+    ("Executive Summary", "doc_executive"),
+    ("Remediation Suggestions", "suggest_fixes"),
+    ("Trend Summary", "trend_summary"),
+)
+
+
+async def _generate_all(payload: str) -> list[str]:
+    """Run one completion per PACK_REPORTS entry concurrently; all share the system prompt + snapshot prefix."""
+    from app.openai_client import AsyncOpenAIClient
+
+    system_prompt = load_prompt("intune_analyst")
+    instructions = [load_prompt(name) for _, name in PACK_REPORTS]
+    client = AsyncOpenAIClient()
+    tasks = [
+        asyncio.create_task(client.generate_response(system_prompt, payload, instruction=instruction))
+        for instruction in instructions
+    ]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # gather raises on the first failure while the other calls are still in flight; cancel and
+        # settle them before closing the httpx client they share.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.close()
+
+
+app = typer.Typer(help="Executive summary, remediation suggestions, and trend summary in one run.")
+
+
+@app.callback(invoke_without_command=True)
+def report_pack_cmd(
+    save: bool = typer.Option(False, "--save", help="Save output to reports/report_pack_<timestamp>.txt"),
+    top: int = typer.Option(10000, "--top", help="Max devices, apps, and configs to fetch for snapshot."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore the cached Intune snapshot and fetch fresh Graph data."),
+) -> None:
+    """Fetch the Intune snapshot once and generate the three reports with concurrent AI calls."""
+    from app.clients import get_graph
+    from app.graph_cache import get_cached_snapshot, snapshot_payload
+    from app.graph_client import GraphClientError
+    from app.openai_client import OpenAIClientError
+
+    limitations: list[str] = []
+    try:
+        graph = get_graph()
+    except GraphClientError as e:
+        console.print(f"[red]Graph error: {e}[/red]")
+        raise typer.Exit(1)
+
+    snapshot = get_cached_snapshot(graph, top, limitations, use_cache=not no_cache)
+    if snapshot is None:
+        console.print("[yellow]Graph data unavailable (all endpoints failed or no permission). Cannot generate reports.[/yellow]")
+        raise typer.Exit(1)
+
+    if limitations:
+        console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
+
+    payload = snapshot_payload(snapshot)
+    try:
+        executive, fixes, trends = asyncio.run(_generate_all(payload))
+    except ConfigError as e:
+        console.print(f"[red]Configuration error: {e}[/red]")
+        raise typer.Exit(1)
+    except OpenAIClientError as e:
+        console.print(f"[red]OpenAI / Azure OpenAI error: {e}[/red]")
+        raise typer.Exit(1)
+
+    render_report(executive, "executive")
+    render_fixes(fixes)
+    render_trends(trends)
+
+    if save:
+        out_path = save_report(
+            "report_pack",
+            "\n\n".join(f"# {title}\n\n{text}" for (title, _), text in zip(PACK_REPORTS, (executive, fixes, trends))),
+        )
+        console.print(f"[green]Saved to {out_path}[/green]")
@@ -1,52 +1,77 @@
 """suggest-fixes command: AI remediation suggestions from Intune snapshot."""
 
-import json
 import re
-from datetime import datetime
-from pathlib import Path
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
 
 from app.config import ConfigError
-from app.graph_client import GraphClient, GraphClientError
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
+from app.util.report_io import save_report
 
 console = Console()
 
 PERMISSION_MSG = "Insufficient Graph API permissions to perform this action. Contact admin."
 
 
-def _load_prompt(name: str) -> str:
-    """Load prompt from app/prompts/{name}.txt."""
-    prompts_dir = Path(__file__).resolve().parent.parent / "prompts"
-    return (prompts_dir / f"{name}.txt").read_text(encoding="utf-8").strip()
+def _section_re(header: str) -> re.Pattern[str]:
+    """Pattern capturing the text under a ## header until the next ## or end."""
+    return re.compile(rf"##\s*{re.escape(header)}\s*\n(.*?)(?=##\s|\Z)", re.DOTALL | re.IGNORECASE)
+
+
+# The three headers the suggest_fixes prompt asks for, compiled once.
+_SECTION_RES: dict[str, re.Pattern[str]] = {
+    h: _section_re(h) for h in ("Immediate Actions", "Self-Remediation", "Escalation Required")
+}
 
 
 def _section_text(content: str, header: str) -> str:
     """Extract text under a ## header until the next ## or end."""
-    pattern = rf"##\s*{re.escape(header)}\s*\n(.*?)(?=##\s|\Z)"
-    match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
+    pattern = _SECTION_RES.get(header) or _section_re(header)
+    match = pattern.search(content)
     return match.group(1).strip() if match else ""
 
 
+def render_fixes(response: str) -> None:
+    """Print the Immediate Actions / Self-Remediation / Escalation Required panels (whole response if none found)."""
+    from rich.panel import Panel
+
+    immediate = _section_text(response, "Immediate Actions")
+    self_remed = _section_text(response, "Self-Remediation")
+    escalation = _section_text(response, "Escalation Required")
+
+    if immediate:
+        console.print(Panel(immediate, title="Immediate Actions", border_style="red"))
+    if self_remed:
+        console.print(Panel(self_remed, title="Self-Remediation", border_style="green"))
+    if escalation:
+        console.print(Panel(escalation, title="Escalation Required", border_style="yellow"))
+    if not (immediate or self_remed or escalation):
+        console.print(Panel(response, title="Remediation Suggestions", border_style="blue"))
+
+
 app = typer.Typer(help="AI remediation suggestions from Intune devices, apps, and configs.")
 
 
 @app.callback(invoke_without_command=True)
 def suggest_fixes_cmd(
     save: bool = typer.Option(False, "--save", help="Save output to reports/suggest_fixes_<timestamp>.txt"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore the cached Intune snapshot and fetch fresh Graph data."),
 ) -> None:
     """Fetch Intune data, get AI remediation suggestions, and display as Immediate Actions / Self-Remediation / Escalation."""
+    from app.clients import get_graph, get_openai
+    from app.graph_cache import get_cached_snapshot, snapshot_payload
+    from app.graph_client import GraphClientError
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
-    snapshot = graph._build_intune_snapshot(limitations=limitations, top=10000)
+    snapshot = get_cached_snapshot(graph, 10000, limitations, use_cache=not no_cache)
     if snapshot is None:
         console.print("[yellow]Graph data unavailable (all endpoints failed or no permission). Cannot generate suggestions.[/yellow]")
         raise typer.Exit(1)
@@ -54,11 +79,12 @@ def suggest_fixes_cmd(
     if limitations:
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
 
-    payload = json.dumps(snapshot, default=str, indent=2)
+    payload = snapshot_payload(snapshot)
     try:
-        system_prompt = _load_prompt("suggest_fixes")
-        client = OpenAIClient()
-        response = client.generate_response(system_prompt, payload)
+        client = get_openai()
+        response = client.generate_response(
+            load_prompt("intune_analyst"), payload, instruction=load_prompt("suggest_fixes")
+        )
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -66,23 +92,8 @@ def suggest_fixes_cmd(
         console.print(f"[red]OpenAI / Azure OpenAI error: {e}[/red]")
         raise typer.Exit(1)
 
-    immediate = _section_text(response, "Immediate Actions")
-    self_remed = _section_text(response, "Self-Remediation")
-    escalation = _section_text(response, "Escalation Required")
-
-    if immediate:
-        console.print(Panel(immediate, title="Immediate Actions", border_style="red"))
-    if self_remed:
-        console.print(Panel(self_remed, title="Self-Remediation", border_style="green"))
-    if escalation:
-        console.print(Panel(escalation, title="Escalation Required", border_style="yellow"))
-    if not (immediate or self_remed or escalation):
-        console.print(Panel(response, title="Remediation Suggestions", border_style="blue"))
+    render_fixes(response)
 
     if save:
-        reports_dir = Path("reports")
-        reports_dir.mkdir(exist_ok=True)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_path = reports_dir / f"suggest_fixes_{ts}.txt"
-        out_path.write_text(response, encoding="utf-8")
+        out_path = save_report("suggest_fixes", response)
         console.print(f"[green]Saved to {out_path}[/green]")
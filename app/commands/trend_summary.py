@@ -1,28 +1,22 @@
 """trend-summary command: AI trend summary from Intune snapshot."""
 
-import json
 import re
-from datetime import datetime
-from pathlib import Path
 
 import typer
 from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
 from app.config import ConfigError
-from app.graph_client import GraphClient, GraphClientError
-from app.openai_client import OpenAIClient, OpenAIClientError
+from app.prompts.loader import load_prompt
+from app.util.report_io import save_report
 
 console = Console()
 
 PERMISSION_MSG = "Insufficient Graph API permissions to perform this action. Contact admin."
 
-
-def _load_prompt(name: str) -> str:
-    """Load prompt from app/prompts/{name}.txt."""
-    prompts_dir = Path(__file__).resolve().parent.parent / "prompts"
-    return (prompts_dir / f"{name}.txt").read_text(encoding="utf-8").strip()
+_SUMMARY_RE = re.compile(r"Executive Summary:\s*(.+?)(?:\n|$)", re.DOTALL | re.IGNORECASE)
+_PIPE_ROW_RE = re.compile(r"^.*\|.*$", re.MULTILINE)
+_SEP_CHARS = "-| \t\r\f\v"
+_HEADER_WORDS = ("trend", "insight", "action")
 
 
 def _parse_trend_response(response: str) -> tuple[list[tuple[str, str, str]], str]:
@@ -31,41 +25,69 @@ def _parse_trend_response(response: str) -> tuple[list[tuple[str, str, str]], st
     summary = ""
 
     # Find Executive Summary line
-    summary_match = re.search(r"Executive Summary:\s*(.+?)(?:\n|$)", response, re.DOTALL | re.IGNORECASE)
+    summary_match = _SUMMARY_RE.search(response)
     if summary_match:
         summary = summary_match.group(1).strip()
 
-    # Find table-like content: lines with pipes (Trend | Insight | Suggested Action)
-    lines = response.split("\n")
-    for line in lines:
-        line = line.strip()
-        if "|" in line and not re.match(r"^[-|\s]+$", line):
-            parts = [p.strip() for p in line.split("|")]
-            if len(parts) >= 3:
-                # Skip header row if it looks like column names
-                if re.match(r"(?i)trend|insight|action", parts[0]) and re.match(r"(?i)trend|insight|action", parts[1]):
-                    continue
-                rows.append((parts[0], parts[1], parts[2]))
+    # Table-like content: one regex scan yields only the lines containing a pipe (Trend | Insight | Suggested Action)
+    for m in _PIPE_ROW_RE.finditer(response):
+        line = m.group(0).strip()
+        if not line.strip(_SEP_CHARS):  # separator row such as |---|---|---|
+            continue
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) >= 3:
+            # Skip header row if it looks like column names
+            if parts[0].lower().startswith(_HEADER_WORDS) and parts[1].lower().startswith(_HEADER_WORDS):
+                continue
+            rows.append((parts[0], parts[1], parts[2]))
 
     return rows, summary
 
 
+def render_trends(response: str) -> None:
+    """Print the Top trends table (whole response as a panel if no rows parse) and the executive summary panel."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    rows, executive_summary = _parse_trend_response(response)
+
+    if rows:
+        table = Table(title="Top trends")
+        table.add_column("Trend", style="cyan")
+        table.add_column("Insight", style="green")
+        table.add_column("Suggested Action", style="yellow")
+        for trend, insight, action in rows:
+            table.add_row(trend, insight, action)
+        console.print(table)
+    else:
+        console.print(Panel(response, title="Trend summary", border_style="blue"))
+
+    if executive_summary:
+        console.print(Panel(executive_summary, title="Executive Summary", border_style="blue"))
+
+
 app = typer.Typer(help="AI trend summary from Intune devices, apps, and configs.")
 
 
 @app.callback(invoke_without_command=True)
 def trend_summary_cmd(
     save: bool = typer.Option(False, "--save", help="Save output to reports/trend_summary_<timestamp>.txt"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore the cached Intune snapshot and fetch fresh Graph data."),
 ) -> None:
     """Fetch Intune data, get AI trend summary (top 3 trends + executive summary)."""
+    from app.clients import get_graph, get_openai
+    from app.graph_cache import get_cached_snapshot, snapshot_payload
+    from app.graph_client import GraphClientError
+    from app.openai_client import OpenAIClientError
+
     limitations: list[str] = []
     try:
-        graph = GraphClient()
+        graph = get_graph()
     except GraphClientError as e:
         console.print(f"[red]Graph error: {e}[/red]")
         raise typer.Exit(1)
 
-    snapshot = graph._build_intune_snapshot(limitations=limitations, top=10000)
+    snapshot = get_cached_snapshot(graph, 10000, limitations, use_cache=not no_cache)
     if snapshot is None:
         console.print("[yellow]Graph data unavailable (all endpoints failed or no permission). Cannot generate trend summary.[/yellow]")
         raise typer.Exit(1)
@@ -73,11 +95,12 @@ def trend_summary_cmd(
     if limitations:
         console.print(f"[yellow]{PERMISSION_MSG}[/yellow]")
 
-    payload = json.dumps(snapshot, default=str, indent=2)
+    payload = snapshot_payload(snapshot)
     try:
-        system_prompt = _load_prompt("trend_summary")
-        client = OpenAIClient()
-        response = client.generate_response(system_prompt, payload)
+        client = get_openai()
+        response = client.generate_response(
+            load_prompt("intune_analyst"), payload, instruction=load_prompt("trend_summary")
+        )
     except ConfigError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
         raise typer.Exit(1)
@@ -85,26 +108,8 @@ def trend_summary_cmd(
         console.print(f"[red]OpenAI / Azure OpenAI error: {e}[/red]")
         raise typer.Exit(1)
 
-    rows, executive_summary = _parse_trend_response(response)
-
-    if rows:
-        table = Table(title="Top trends")
-        table.add_column("Trend", style="cyan")
-        table.add_column("Insight", style="green")
-        table.add_column("Suggested Action", style="yellow")
-        for trend, insight, action in rows:
-            table.add_row(trend, insight, action)
-        console.print(table)
-    else:
-        console.print(Panel(response, title="Trend summary", border_style="blue"))
-
-    if executive_summary:
-        console.print(Panel(executive_summary, title="Executive Summary", border_style="blue"))
+    render_trends(response)
 
     if save:
-        reports_dir = Path("reports")
-        reports_dir.mkdir(exist_ok=True)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_path = reports_dir / f"trend_summary_{ts}.txt"
-        out_path.write_text(response, encoding="utf-8")
+        out_path = save_report("trend_summary", response)
         console.print(f"[green]Saved to {out_path}[/green]")
@@ -9,6 +9,7 @@ from typing import Optional
 
 from dotenv import load_dotenv
 import os
+import sys
 
 
 class ConfigError(Exception):
@@ -17,7 +18,7 @@ class ConfigError(Exception):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     """Application configuration from environment variables.
 
@@ -33,14 +34,44 @@ class AppConfig:
     azure_tenant_id: str
     azure_client_id: str
     azure_client_secret: str
+    response_cache_ttl: int = 86400  # Seconds to reuse identical AI responses; 0 disables the cache
 
 
 _config: Optional[AppConfig] = None
 
 
-def _getenv(key: str, default: str = "") -> str:
-    """Get env var, stripped; default if missing."""
-    return (os.environ.get(key) or default).strip()
+# Every environment variable get_config() reads.
+_ENV_KEYS = (
+    "OPENAI_API_KEY",
+    "AZURE_OPENAI_API_KEY",
+    "AZURE_OPENAI_ENDPOINT",
+    "AZURE_OPENAI_API_VERSION",
+    "AZURE_OPENAI_DEPLOYMENT",
+    "AZURE_TENANT_ID",
+    "AZURE_CLIENT_ID",
+    "AZURE_CLIENT_SECRET",
+    "OPENAI_RESPONSE_CACHE_TTL",
+)
+# Credentials that must be present for every feature (the API key may come from either variable).
+_API_KEY_ENV_KEYS = ("OPENAI_API_KEY", "AZURE_OPENAI_API_KEY")
+_REQUIRED_ENV_KEYS = ("AZURE_TENANT_ID", "AZURE_CLIENT_ID", "AZURE_CLIENT_SECRET")
+
+
+def _parse_int(key: str, raw: str, default: int) -> int:
+    """
+    Parse a non-negative int env value; default if empty. An invalid value prints a warning to stderr
+    and falls back to default: these are optional tuning knobs and must not stop commands that don't use them.
+    """
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = -1
+    if value < 0:
+        print(f"Warning: {key} must be a non-negative whole number of seconds (got {raw!r}); using {default}.", file=sys.stderr)
+        return default
+    return value
 
 
 def get_config() -> AppConfig:
@@ -49,9 +80,13 @@ def get_config() -> AppConfig:
     if _config is not None:
         return _config
 
-    load_dotenv()
+    # When the credentials are already exported (CI, containers, shell exports) the environment is
+    # treated as complete and .env is not parsed; optional settings must then be exported as well.
+    if not (any(key in os.environ for key in _API_KEY_ENV_KEYS) and all(key in os.environ for key in _REQUIRED_ENV_KEYS)):
+        load_dotenv()
+    env = {key: (os.environ.get(key) or "").strip() for key in _ENV_KEYS}
 
-    openai_api_key = _getenv("OPENAI_API_KEY") or _getenv("AZURE_OPENAI_API_KEY")
+    openai_api_key = env["OPENAI_API_KEY"] or env["AZURE_OPENAI_API_KEY"]
     if not openai_api_key:
         raise ConfigError(
             "OPENAI_API_KEY is missing or empty. Set it in .env "
@@ -61,12 +96,12 @@ def get_config() -> AppConfig:
 
     _config = AppConfig(
         openai_api_key=openai_api_key,
-        azure_openai_endpoint=_getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_openai_api_version=_getenv("AZURE_OPENAI_API_VERSION")
-        or "2024-02-15-preview",
-        azure_openai_deployment=_getenv("AZURE_OPENAI_DEPLOYMENT") or "gpt-4o-mini",
-        azure_tenant_id=_getenv("AZURE_TENANT_ID"),
-        azure_client_id=_getenv("AZURE_CLIENT_ID"),
-        azure_client_secret=_getenv("AZURE_CLIENT_SECRET"),
+        azure_openai_endpoint=env["AZURE_OPENAI_ENDPOINT"],
+        azure_openai_api_version=env["AZURE_OPENAI_API_VERSION"] or "2024-02-15-preview",
+        azure_openai_deployment=env["AZURE_OPENAI_DEPLOYMENT"] or "gpt-4o-mini",
+        azure_tenant_id=env["AZURE_TENANT_ID"],
+        azure_client_id=env["AZURE_CLIENT_ID"],
+        azure_client_secret=env["AZURE_CLIENT_SECRET"],
+        response_cache_ttl=_parse_int("OPENAI_RESPONSE_CACHE_TTL", env["OPENAI_RESPONSE_CACHE_TTL"], 86400),
     )
     return _config
@@ -0,0 +1,99 @@
+"""Short-lived cache for the Intune snapshot built by GraphClient._build_intune_snapshot.
+
+Building the snapshot pages through up to `top` devices, apps, and configurations.
+Commands that run back to back (doc-intune, suggest-fixes, trend-summary, copilot)
+reuse one fetch for SNAPSHOT_TTL seconds: first from process memory, then from the
+on-disk cache under ~/.cache/it-copilot/graph. Keyed by tenant id and top.
+
+This TTL is the only revalidation: the v1.0 Intune collections used by the snapshot
+(managedDevices, mobileApps, deviceConfigurations) offer no delta query and return no
+ETag, so there is nothing to send If-None-Match against.
+"""
+
+import hashlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.config import get_config
+from app.util.disk_cache import DiskCache
+from app.util.json_fast import dumps_str
+
+if TYPE_CHECKING:
+    from app.graph_client import GraphClient
+
+SNAPSHOT_TTL = 300
+
+_memory: dict[str, tuple[float, dict[str, Any]]] = {}
+_memory_lock = threading.Lock()
+
+# (snapshot, JSON text) for the last snapshot serialized. Holding the snapshot keeps its id() from
+# being reused, so an identity check is safe (unlike an lru_cache keyed by id()).
+_last_payload: Optional[tuple[dict[str, Any], str]] = None
+
+
+def _snapshot_key(top: int) -> str:
+    """Hash of tenant id and top (filename-safe, and the tenant id is not written to disk in clear)."""
+    tenant_id = get_config().azure_tenant_id or ""
+    return hashlib.sha256(f"{tenant_id}:intune:{top}".encode("utf-8")).hexdigest()
+
+
+def get_cached_snapshot(
+    graph: "GraphClient",
+    top: int,
+    limitations: list,
+    use_cache: bool = True,
+) -> Optional[dict[str, Any]]:
+    """
+    Return the Intune snapshot for (tenant, top), building it via graph._build_intune_snapshot on a miss.
+    Limitation messages recorded when the snapshot was built are appended to limitations on a hit, so
+    permission warnings still show. use_cache=False always fetches fresh (and refreshes the cache).
+    A None snapshot (all endpoints failed) is never cached.
+    """
+    key = _snapshot_key(top)
+    disk = DiskCache("graph", SNAPSHOT_TTL)
+
+    if use_cache:
+        with _memory_lock:
+            hit = _memory.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            entry = hit[1]
+        else:
+            # Promote a disk hit into memory for its remaining TTL, so later calls in this process get
+            # the same snapshot object (and snapshot_payload's identity memo applies).
+            disk_hit = disk.get_with_ttl(key)
+            entry = disk_hit[0] if disk_hit is not None else None
+            if disk_hit is not None and isinstance(entry, dict):
+                with _memory_lock:
+                    _memory[key] = (time.monotonic() + disk_hit[1], entry)
+        if isinstance(entry, dict) and isinstance(entry.get("snapshot"), dict):
+            limitations.extend(entry.get("limitations") or [])
+            graph.set_permission_status(entry.get("status") or {})
+            return entry["snapshot"]
+
+    fresh_limitations: list[str] = []
+    snapshot = graph._build_intune_snapshot(limitations=fresh_limitations, top=top)
+    limitations.extend(fresh_limitations)
+    if snapshot is None:
+        return None
+
+    entry = {"snapshot": snapshot, "limitations": fresh_limitations, "status": graph.get_permission_status()}
+    with _memory_lock:
+        _memory[key] = (time.monotonic() + SNAPSHOT_TTL, entry)
+    disk.set(key, entry)
+    return snapshot
+
+
+def snapshot_payload(snapshot: dict[str, Any]) -> str:
+    """
+    Compact JSON text of snapshot for the AI. Memoized on object identity: snapshots returned from the
+    in-process cache are the same object, so commands run in one process serialize them once.
+    Snapshots are treated as read-only after they are built.
+    """
+    global _last_payload
+    last = _last_payload
+    if last is not None and last[0] is snapshot:
+        return last[1]
+    payload = dumps_str(snapshot)
+    _last_payload = (snapshot, payload)
+    return payload
@@ -1,11 +1,60 @@
 """Microsoft Graph API client (client credentials flow). No CLI, no printing."""
 
-from typing import Any, Optional
+import atexit
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Sequence
+from urllib.parse import urlencode
 
 import msal
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.config import get_config
+from app.util.disk_cache import cache_root, write_private_file
+from app.util.json_fast import loads
+
+# Guards limitations.append when _safe_graph calls run concurrently on worker threads.
+_LIMITATIONS_LOCK = threading.Lock()
+
+# MSAL apps shared by every GraphClient in the process, keyed by (tenant, client id, secret). Reusing one
+# app skips repeated authority setup and lets MSAL's in-memory token cache serve later clients.
+_APP_CACHE: dict[tuple[str, str, str], msal.ConfidentialClientApplication] = {}
+_APP_CACHE_LOCK = threading.Lock()
+
+# MSAL token cache persisted under the shared cache dir, so a new CLI run reuses an unexpired access
+# token instead of a network acquisition. Loaded on first _get_app, written at exit only if it changed.
+TOKEN_CACHE_FILE = "msal_token_cache.json"
+_TOKEN_CACHE: Optional[msal.SerializableTokenCache] = None
+
+
+def _save_token_cache(cache: msal.SerializableTokenCache, path: Path) -> None:
+    """atexit hook: persist the MSAL token cache (0600) if tokens were added or removed. Errors are ignored."""
+    if cache.has_state_changed:
+        try:
+            write_private_file(path, cache.serialize())
+        except OSError:
+            pass
+
+
+def _shared_token_cache() -> msal.SerializableTokenCache:
+    """Process-wide MSAL token cache, loaded from disk once. Caller holds _APP_CACHE_LOCK."""
+    global _TOKEN_CACHE
+    if _TOKEN_CACHE is None:
+        cache = msal.SerializableTokenCache()
+        path = cache_root() / TOKEN_CACHE_FILE
+        try:
+            cache.deserialize(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass  # missing or unreadable: start empty
+        atexit.register(_save_token_cache, cache, path)
+        _TOKEN_CACHE = cache
+    return _TOKEN_CACHE
 
 
 def _is_403(e: "GraphClientError") -> bool:
@@ -14,35 +63,86 @@ def _is_403(e: "GraphClientError") -> bool:
 
 
 def _safe_graph(
-    thunk,
+    func,
+    *args: Any,
     default: Optional[dict] = None,
     limitations: Optional[list] = None,
+    **kwargs: Any,
 ):
     """
-    Run a Graph call (no-arg thunk). Single consistent pattern for all Graph calls.
+    Run a Graph call, func(*args, **kwargs), with no wrapping lambda. Single consistent pattern for all Graph calls.
     - 403 → append to limitations, return default, do NOT raise
     - 404 → append 'Not found (404)', return default
     - Other HTTP → append with status code, return default
     - Network/auth errors → append error type, return default
-    Never prints; callers handle display.
+    Never prints; callers handle display. Safe to call from worker threads sharing one limitations list.
     """
     default = default if default is not None else {}
     limitations = limitations if limitations is not None else []
     try:
-        return thunk()
+        return func(*args, **kwargs)
     except GraphClientError as e:
         code = getattr(e, "status_code", None)
         if code == 403:
-            limitations.append("Permission-limited: request returned 403")
+            message = "Permission-limited: request returned 403"
         elif code == 404:
-            limitations.append("Not found (404)")
+            message = "Not found (404)"
         elif code is not None:
-            limitations.append(f"Error: HTTP {code}")
+            message = f"Error: HTTP {code}"
         else:
-            limitations.append("Error: network or auth failure")
+            message = "Error: network or auth failure"
+        with _LIMITATIONS_LOCK:
+            limitations.append(message)
         return default
 
 
+def _reduce_devices(pages: Iterable[list[dict[str, Any]]]) -> dict[str, Any]:
+    """Fold managed device pages into compliance-state, OS, and non-compliant-by-OS counts."""
+    # One pass per page counts raw (OS, state) pairs; the handful of distinct pairs is case-folded and
+    # split afterwards, so no per-device .lower() or intermediate lists.
+    total = 0
+    pairs: Counter[tuple[str, str]] = Counter()
+    for page in pages:
+        total += len(page)
+        pairs.update((d.get("operatingSystem") or "Unknown", d.get("complianceState") or "unknown") for d in page)
+
+    states: Counter[str] = Counter()
+    os_breakdown: Counter[str] = Counter()
+    non_compliant_by_os: Counter[str] = Counter()
+    for (os_name, state), count in pairs.items():
+        state = state.lower()
+        states[state] += count
+        os_breakdown[os_name] += count
+        if state == "noncompliant":
+            non_compliant_by_os[os_name] += count
+    return {"total": total, "states": states, "os_breakdown": os_breakdown, "non_compliant_by_os": non_compliant_by_os}
+
+
+def _reduce_apps(pages: Iterable[list[dict[str, Any]]]) -> dict[str, Any]:
+    """Fold mobile app pages into a count per app type (@odata.type without the namespace)."""
+    total = 0
+    types: Counter[str] = Counter()
+    for page in pages:
+        total += len(page)
+        types.update((a.get("@odata.type") or "unknown").replace("#microsoft.graph.", "") for a in page)
+    return {"total": total, "types": types}
+
+
+def _reduce_configs(pages: Iterable[list[dict[str, Any]]]) -> dict[str, Any]:
+    """Fold device configuration pages into a count and the list of policy display names."""
+    total = 0
+    names: list[str] = []
+    for page in pages:
+        total += len(page)
+        names.extend(c["displayName"] for c in page if c.get("displayName"))
+    return {"total": total, "names": names}
+
+
+# Page reducers for SNAPSHOT_ENDPOINTS, same order. Each collection is reduced page by page as it is
+# fetched, so the snapshot never holds every device/app/config object at once.
+_SNAPSHOT_REDUCERS = (_reduce_devices, _reduce_apps, _reduce_configs)
+
+
 class GraphClientError(Exception):
     """Raised when Graph auth or API request fails. No secrets in message."""
 
@@ -54,20 +154,81 @@ class GraphClientError(Exception):
 GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
 GRAPH_SCOPE = "https://graph.microsoft.com/.default"
 REQUEST_TIMEOUT = 30
+TOKEN_EXPIRY_MARGIN = 60  # Seconds before expires_in at which a cached access token is treated as expired
+MAX_RETRY_AFTER = 30  # Seconds; cap on any single Retry-After wait, transport-level and $batch alike
+
+
+class _CappedRetry(Retry):
+    """urllib3 Retry that honors Retry-After up to MAX_RETRY_AFTER (urllib3 alone waits however long it says)."""
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+# Transport-level retries for transient failures and throttling (Retry-After honored, capped).
+# raise_on_status=False hands the last response back so _request reports its HTTP status.
+HTTP_RETRY = _CappedRetry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET", "POST"),
+    raise_on_status=False,
+)
+BATCH_MAX_REQUESTS = 20  # Graph JSON batching limit per $batch POST
+# $batch sub-requests are throttled individually (the POST itself succeeds), so HTTP_RETRY never sees
+# them: _batch re-sends throttled sub-requests itself, honoring their Retry-After header.
+THROTTLE_STATUSES = (429, 503)
+BATCH_THROTTLE_RETRIES = 3
+PROBE_WORKERS = 8  # Concurrent single probes when a $batch POST fails (within the session pool size)
+
+# Collections fetched by _build_intune_snapshot, in snapshot order: devices, apps, configs.
+# (endpoint, $select): only the fields the snapshot aggregates. Full managed device objects run to
+# several KB each; mobileApps items carry @odata.type without selecting it.
+SNAPSHOT_ENDPOINTS = (
+    ("deviceManagement/managedDevices", "id,complianceState,operatingSystem"),
+    ("deviceAppManagement/mobileApps", "id"),
+    ("deviceManagement/deviceConfigurations", "id,displayName"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EndpointEntry:
+    """
+    One Graph endpoint probed by check-permissions. params/json_body are sent as-is.
+    url (absolute, for direct requests) and batch_url (relative with query string, for $batch) are
+    computed once when the entry is created.
+    """
 
-# Single source of truth for all Graph endpoints used or probed. Adding a new endpoint = add one dict here.
-ENDPOINT_REGISTRY: list[dict[str, Any]] = [
-    {"area": "Managed Devices", "endpoint": "deviceManagement/managedDevices", "method": "GET", "params": {"$top": 1}, "currently_granted": True},
-    {"area": "Mobile Apps", "endpoint": "deviceAppManagement/mobileApps", "method": "GET", "params": {"$top": 1}, "currently_granted": True},
-    {"area": "Device Configurations", "endpoint": "deviceManagement/deviceConfigurations", "method": "GET", "params": {"$top": 1}, "currently_granted": True},
-    {"area": "Service Config", "endpoint": "deviceManagement/deviceEnrollmentConfigurations", "method": "GET", "params": {"$top": 1}, "currently_granted": True},
-    {"area": "Reports", "endpoint": "deviceManagement/reports/getConfigurationPolicyNonComplianceSummaryReport", "method": "POST", "params": None, "json_body": {}, "currently_granted": True},
-    {"area": "Users", "endpoint": "users", "method": "GET", "params": {"$top": 1}, "currently_granted": False},
-    {"area": "Groups", "endpoint": "groups", "method": "GET", "params": {"$top": 1}, "currently_granted": False},
-    {"area": "Conditional Access", "endpoint": "identity/conditionalAccess/policies", "method": "GET", "params": {"$top": 1}, "currently_granted": False},
-    {"area": "Security Alerts", "endpoint": "security/alerts_v2", "method": "GET", "params": {"$top": 1}, "currently_granted": False},
-    {"area": "Licenses", "endpoint": "subscribedSkus", "method": "GET", "params": {"$top": 1}, "currently_granted": False},
-]
+    area: str
+    endpoint: str
+    currently_granted: bool
+    method: str = "GET"
+    params: Optional[dict[str, Any]] = None
+    json_body: Optional[dict[str, Any]] = None
+    url: str = field(init=False, repr=False, compare=False)
+    batch_url: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        path = self.endpoint.strip("/")
+        query = "?" + urlencode(self.params, safe="$") if self.params else ""
+        object.__setattr__(self, "url", f"{GRAPH_BASE_URL}/{path}")
+        object.__setattr__(self, "batch_url", f"/{path}{query}")
+
+
+# Single source of truth for all Graph endpoints used or probed. Adding a new endpoint = add one EndpointEntry here.
+ENDPOINT_REGISTRY: tuple[EndpointEntry, ...] = (
+    EndpointEntry("Managed Devices", "deviceManagement/managedDevices", True, params={"$top": 1}),
+    EndpointEntry("Mobile Apps", "deviceAppManagement/mobileApps", True, params={"$top": 1}),
+    EndpointEntry("Device Configurations", "deviceManagement/deviceConfigurations", True, params={"$top": 1}),
+    EndpointEntry("Service Config", "deviceManagement/deviceEnrollmentConfigurations", True, params={"$top": 1}),
+    EndpointEntry("Reports", "deviceManagement/reports/getConfigurationPolicyNonComplianceSummaryReport", True, method="POST", json_body={}),
+    EndpointEntry("Users", "users", False, params={"$top": 1}),
+    EndpointEntry("Groups", "groups", False, params={"$top": 1}),
+    EndpointEntry("Conditional Access", "identity/conditionalAccess/policies", False, params={"$top": 1}),
+    EndpointEntry("Security Alerts", "security/alerts_v2", False, params={"$top": 1}),
+    EndpointEntry("Licenses", "subscribedSkus", False, params={"$top": 1}),
+)
 
 
 class GraphClient:
@@ -85,22 +246,61 @@ class GraphClient:
         self._client_id = config.azure_client_id
         self._client_secret = config.azure_client_secret
         self._base_url = GRAPH_BASE_URL
+        self._url_prefix = GRAPH_BASE_URL.rstrip("/") + "/"  # joined with relative endpoints in _request
         self._app: Optional[msal.ConfidentialClientApplication] = None
         self._last_snapshot_status: dict[str, str] = {}
+        self._cached_token: Optional[str] = None
+        self._token_expiry = 0.0  # time.monotonic() deadline for _cached_token
+        self._token_lock = threading.Lock()  # snapshot and probe worker threads share the token
+        # One keep-alive session for every Graph call; pool_maxsize covers the snapshot's worker threads.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=HTTP_RETRY))
+
+    def close(self) -> None:
+        """Close pooled HTTP connections."""
+        self._session.close()
+
+    def __enter__(self) -> "GraphClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def _get_app(self) -> msal.ConfidentialClientApplication:
-        """Lazy MSAL app (in-memory only)."""
+        """Lazy MSAL app, shared across instances via _APP_CACHE; its token cache is persisted (see TOKEN_CACHE_FILE)."""
         if self._app is None:
-            authority = f"https://login.microsoftonline.com/{self._tenant_id}"
-            self._app = msal.ConfidentialClientApplication(
-                self._client_id,
-                authority=authority,
-                client_credential=self._client_secret,
-            )
+            key = (self._tenant_id, self._client_id, self._client_secret)
+            with _APP_CACHE_LOCK:
+                app = _APP_CACHE.get(key)
+                if app is None:
+                    # Standard public-cloud authority: skip the instance discovery metadata request.
+                    app = msal.ConfidentialClientApplication(
+                        self._client_id,
+                        authority=f"https://login.microsoftonline.com/{self._tenant_id}",
+                        client_credential=self._client_secret,
+                        instance_discovery=False,
+                        token_cache=_shared_token_cache(),
+                    )
+                    _APP_CACHE[key] = app
+            self._app = app
         return self._app
 
     def get_access_token(self) -> str:
-        """Acquire token for client credentials flow. Raise GraphClientError on failure."""
+        """
+        Acquire token for client credentials flow. Raise GraphClientError on failure.
+        The token is kept on the client until TOKEN_EXPIRY_MARGIN seconds before it expires, so
+        paginated sweeps do not go through MSAL for every request.
+        """
+        if self._cached_token is not None and time.monotonic() < self._token_expiry:
+            return self._cached_token
+        with self._token_lock:
+            # Another thread may have refreshed the token while this one waited for the lock.
+            if self._cached_token is not None and time.monotonic() < self._token_expiry:
+                return self._cached_token
+            return self._acquire_token()
+
+    def _acquire_token(self) -> str:
+        """Fetch a new token from MSAL and cache it. Caller holds _token_lock."""
         try:
             app = self._get_app()
             result = app.acquire_token_for_client(scopes=[GRAPH_SCOPE])
@@ -115,7 +315,9 @@ class GraphClient:
                 msg += f" {desc[:200]}"
             raise GraphClientError(msg)
 
-        return result["access_token"]
+        self._cached_token = result["access_token"]
+        self._token_expiry = time.monotonic() + int(result.get("expires_in") or 3600) - TOKEN_EXPIRY_MARGIN
+        return self._cached_token
 
     def _request(
         self,
@@ -130,16 +332,16 @@ class GraphClient:
         except GraphClientError:
             raise
 
-        if endpoint.startswith("http://") or endpoint.startswith("https://"):
+        if endpoint.startswith(("https://", "http://")):
             url = endpoint
         else:
-            url = f"{self._base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+            url = self._url_prefix + endpoint.lstrip("/")
         headers = {"Authorization": f"Bearer {token}"}
         if json_body is not None:
             headers["Content-Type"] = "application/json"
 
         try:
-            resp = requests.request(
+            resp = self._session.request(
                 method,
                 url,
                 headers=headers,
@@ -159,7 +361,7 @@ class GraphClient:
         if not resp.content:
             return {}
         try:
-            return resp.json()
+            return loads(resp.content)
         except ValueError:
             raise GraphClientError("Microsoft Graph returned invalid JSON.")
 
@@ -173,34 +375,109 @@ class GraphClient:
         data = self._request("GET", "users", params={"$top": top})
         return data if isinstance(data, dict) else {}
 
+    def _iter_paginated(
+        self,
+        endpoint: str,
+        max_items: Optional[int] = None,
+        page_size: int = 999,
+        select: Optional[str] = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield items from a collection endpoint one page at a time, following @odata.nextLink.
+        Stops after max_items (None = all pages) or at the first empty page. Pages are fetched lazily,
+        so a consumer that stops early never requests the remaining pages. select is sent as $select
+        (Graph carries it into nextLink).
+        """
+        return self._iter_from_page(self._first_page(endpoint, max_items, page_size, select), max_items)
+
+    def _first_page(
+        self,
+        endpoint: str,
+        max_items: Optional[int],
+        page_size: int = 999,
+        select: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """GET the first page of a collection with $top (and $select if given)."""
+        params: dict[str, Any] = {"$top": min(page_size, max_items) if max_items is not None else page_size}
+        if select:
+            params["$select"] = select
+        return self._request("GET", endpoint, params=params)
+
+    def _iter_from_page(self, data: dict[str, Any], max_items: Optional[int]) -> Iterator[dict[str, Any]]:
+        """Yield items from an already-fetched first page, then follow @odata.nextLink (same stop rules as _iter_paginated)."""
+        for page in self._iter_pages_from(data, max_items):
+            yield from page
+
+    def _iter_pages_from(
+        self,
+        data: dict[str, Any],
+        max_items: Optional[int],
+        prefetch: bool = False,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yield the 'value' list of each page, starting from an already-fetched first page, trimmed so at most
+        max_items items are yielded in total. A caller that reduces each page holds one page in memory at a time.
+        By default the next page is requested only once the consumer asks for it. With prefetch=True (for callers
+        that always drain the iterator) it is requested on a background thread while the consumer handles the
+        current page, so network wait and page processing overlap.
+        """
+        remaining = max_items
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            while True:
+                page = data.get("value") or []
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+                    page = page[:remaining]
+                    remaining -= len(page)
+                next_link = data.get("@odata.nextLink")
+                has_next = bool(next_link) and (remaining is None or remaining > 0)
+                pending = executor.submit(self._request, "GET", next_link) if executor and has_next else None
+                if page:
+                    yield page
+                if not has_next:
+                    return
+                data = pending.result() if pending is not None else self._request("GET", next_link)
+                if not data.get("value"):
+                    return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
     def _get_paginated(
         self,
         endpoint: str,
         max_items: int,
         page_size: int = 999,
+        select: Optional[str] = None,
     ) -> dict[str, Any]:
         """
         GET a collection endpoint with pagination; follow @odata.nextLink until we have max_items or no more pages.
-        Returns {"value": list}. Uses page_size per request (Graph supports up to 999).
+        Returns {"value": list}. Uses page_size per request (Graph supports up to 999); select as in _iter_paginated.
         """
-        params = {"$top": min(page_size, max_items)}
-        data = self._request("GET", endpoint, params=params)
-        values = list(data.get("value") or [])
-        while len(values) < max_items and data.get("@odata.nextLink"):
-            next_link = data["@odata.nextLink"]
-            data = self._request("GET", next_link)
-            chunk = data.get("value") or []
-            values.extend(chunk)
-            if not chunk:
-                break
-        return {"value": values[:max_items]}
+        return {"value": list(self._iter_paginated(endpoint, max_items=max_items, page_size=page_size, select=select))}
 
-    def get_managed_devices(self, top: int = 10) -> dict[str, Any]:
-        """GET /deviceManagement/managedDevices (Intune) with pagination. Returns Graph response dict with full 'value' list."""
+    def _get_collection(self, endpoint: str, top: int, select: Optional[str]) -> dict[str, Any]:
+        """Single GET with $top when top fits one page, else _get_paginated. Shared by the Intune collection getters."""
         if top <= 999:
-            data = self._request("GET", "deviceManagement/managedDevices", params={"$top": top})
+            params: dict[str, Any] = {"$top": top}
+            if select:
+                params["$select"] = select
+            data = self._request("GET", endpoint, params=params)
             return data if isinstance(data, dict) else {}
-        return self._get_paginated("deviceManagement/managedDevices", max_items=top)
+        return self._get_paginated(endpoint, max_items=top, select=select)
+
+    def get_managed_devices(self, top: int = 10, select: Optional[str] = None) -> dict[str, Any]:
+        """
+        GET /deviceManagement/managedDevices (Intune) with pagination. Returns Graph response dict with full 'value' list.
+        select: optional comma-separated $select fields (default: full objects).
+        """
+        return self._get_collection("deviceManagement/managedDevices", top, select)
+
+    def iter_managed_devices(self, top: Optional[int] = None) -> Iterator[dict[str, Any]]:
+        """Yield Intune managed devices page by page (up to top; None = all). Stop iterating to skip remaining pages."""
+        return self._iter_paginated("deviceManagement/managedDevices", max_items=top)
 
     def get_groups(self, top: int = 10) -> dict[str, Any]:
         """GET /groups with $top. Returns Graph response dict."""
@@ -212,43 +489,116 @@ class GraphClient:
         data = self._request("GET", f"deviceManagement/managedDevices/{device_id}")
         return data if isinstance(data, dict) else {}
 
-    def get_mobile_apps(self, top: int = 100) -> dict[str, Any]:
-        """GET /deviceAppManagement/mobileApps with pagination. Requires DeviceManagementApps.ReadWrite.All."""
-        if top <= 999:
-            data = self._request("GET", "deviceAppManagement/mobileApps", params={"$top": top})
-            return data if isinstance(data, dict) else {}
-        return self._get_paginated("deviceAppManagement/mobileApps", max_items=top)
+    def get_mobile_apps(self, top: int = 100, select: Optional[str] = None) -> dict[str, Any]:
+        """GET /deviceAppManagement/mobileApps with pagination and optional $select. Requires DeviceManagementApps.ReadWrite.All."""
+        return self._get_collection("deviceAppManagement/mobileApps", top, select)
 
-    def get_device_configurations(self, top: int = 100) -> dict[str, Any]:
-        """GET /deviceManagement/deviceConfigurations with pagination. Requires DeviceManagementConfiguration.ReadWrite.All."""
-        if top <= 999:
-            data = self._request("GET", "deviceManagement/deviceConfigurations", params={"$top": top})
-            return data if isinstance(data, dict) else {}
-        return self._get_paginated("deviceManagement/deviceConfigurations", max_items=top)
+    def get_device_configurations(self, top: int = 100, select: Optional[str] = None) -> dict[str, Any]:
+        """
+        GET /deviceManagement/deviceConfigurations with pagination and optional $select.
+        Requires DeviceManagementConfiguration.ReadWrite.All.
+        """
+        return self._get_collection("deviceManagement/deviceConfigurations", top, select)
+
+    def _batch(self, requests_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        POST up to BATCH_MAX_REQUESTS sub-requests to /$batch in one round trip.
+        Each item is a Graph batch request dict (id, method, url, optional body/headers).
+        Returns the sub-responses ordered like requests_list. Raise GraphClientError if the batch itself fails.
+        Callers chunk larger workloads; Graph rejects a batch over the limit as a whole.
+        Sub-requests throttled with 429/503 are re-sent (up to BATCH_THROTTLE_RETRIES times) after their
+        Retry-After delay; if still throttled, or a retry POST fails, the throttled sub-response is returned.
+        """
+        if len(requests_list) > BATCH_MAX_REQUESTS:
+            raise ValueError(f"$batch accepts at most {BATCH_MAX_REQUESTS} requests, got {len(requests_list)}.")
+        by_id = self._post_batch(requests_list)
+        for attempt in range(BATCH_THROTTLE_RETRIES):
+            throttled = [r for r in requests_list if by_id.get(r["id"], {}).get("status") in THROTTLE_STATUSES]
+            if not throttled:
+                break
+            time.sleep(self._retry_after([by_id[r["id"]] for r in throttled], attempt))
+            try:
+                by_id.update(self._post_batch(throttled))
+            except GraphClientError:
+                break
+        return [by_id.get(r["id"], {"id": r["id"], "status": None}) for r in requests_list]
+
+    def _post_batch(self, requests_list: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """One $batch POST; return sub-responses keyed by id. Raise GraphClientError if the POST fails."""
+        data = self._request("POST", "$batch", json_body={"requests": requests_list})
+        responses = data.get("responses") if isinstance(data, dict) else None
+        return {r.get("id"): r for r in (responses or [])}
 
-    def probe_endpoint(self, entry: dict[str, Any]) -> tuple[str, str]:
+    @staticmethod
+    def _retry_after(responses: list[dict[str, Any]], attempt: int) -> float:
+        """
+        Seconds to wait before re-sending throttled sub-requests: the largest Retry-After among them
+        (default 1, 2, 4... by attempt), capped at MAX_RETRY_AFTER.
+        """
+        wait = 0.0
+        for resp in responses:
+            for name, value in (resp.get("headers") or {}).items():
+                if name.lower() == "retry-after":
+                    try:
+                        wait = max(wait, float(value))
+                    except (TypeError, ValueError):
+                        pass
+        return min(wait or float(2 ** attempt), MAX_RETRY_AFTER)
+
+    @staticmethod
+    def _probe_request(request_id: str, entry: EndpointEntry) -> dict[str, Any]:
+        """Build one $batch sub-request from an ENDPOINT_REGISTRY entry."""
+        sub: dict[str, Any] = {"id": request_id, "method": entry.method, "url": entry.batch_url}
+        if entry.method == "POST":
+            sub["body"] = entry.json_body or {}
+            sub["headers"] = {"Content-Type": "application/json"}
+        return sub
+
+    @staticmethod
+    def _probe_result(status_code: Optional[int], currently_granted: bool, message: str) -> tuple[str, str]:
+        """Map a probe outcome to (status, notes). status_code None means the call did not complete."""
+        if status_code is not None and 200 <= status_code < 300:
+            return ("Available", "Granted")
+        if status_code == 403:
+            return ("Denied", "Future scope" if not currently_granted else "Not granted (403)")
+        if status_code == 404:
+            return ("Available", "No data")
+        if len(message) > 50:
+            message = message[:47] + "..."
+        return ("Error", f"Error: {message}")
+
+    def probe_endpoint(self, entry: EndpointEntry) -> tuple[str, str]:
         """
         Probe one endpoint from ENDPOINT_REGISTRY. Uses real API call; captures 403/404/other.
         Returns (status, notes): status is 'Available' | 'Denied' | 'Error'; notes is short text.
         """
-        method = entry.get("method", "GET")
-        endpoint = entry.get("endpoint", "")
-        params = entry.get("params")
-        json_body = entry.get("json_body") if method == "POST" else None
-        currently_granted = entry.get("currently_granted", True)
+        json_body = entry.json_body if entry.method == "POST" else None
         try:
-            self._request(method, endpoint, params=params, json_body=json_body)
+            self._request(entry.method, entry.url, params=entry.params, json_body=json_body)
             return ("Available", "Granted")
         except GraphClientError as e:
-            code = getattr(e, "status_code", None)
-            if code == 403:
-                return ("Denied", "Future scope" if not currently_granted else "Not granted (403)")
-            if code == 404:
-                return ("Available", "No data")
-            msg = str(e)
-            if len(msg) > 50:
-                msg = msg[:47] + "..."
-            return ("Error", f"Error: {msg}")
+            return self._probe_result(getattr(e, "status_code", None), entry.currently_granted, str(e))
+
+    def probe_endpoints_batch(self, entries: Sequence[EndpointEntry]) -> list[tuple[str, str]]:
+        """
+        Probe many ENDPOINT_REGISTRY entries with Graph JSON batching: ceil(N/20) round trips instead of N.
+        Returns one (status, notes) per entry, in order. If a batch POST fails, that chunk falls back to
+        probe_endpoint, run concurrently on up to PROBE_WORKERS threads.
+        """
+        results: list[tuple[str, str]] = []
+        for start in range(0, len(entries), BATCH_MAX_REQUESTS):
+            chunk = entries[start:start + BATCH_MAX_REQUESTS]
+            try:
+                responses = self._batch([self._probe_request(str(i), e) for i, e in enumerate(chunk)])
+            except GraphClientError:
+                with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(chunk))) as ex:
+                    results.extend(ex.map(self.probe_endpoint, chunk))
+                continue
+            for entry, resp in zip(chunk, responses):
+                code = resp.get("status")
+                message = f"Microsoft Graph request failed (HTTP {code})." if code is not None else "No response in batch."
+                results.append(self._probe_result(code, entry.currently_granted, message))
+        return results
 
     def get_permission_status(self) -> dict[str, str]:
         """
@@ -257,32 +607,65 @@ class GraphClient:
         """
         return dict(self._last_snapshot_status)
 
+    def set_permission_status(self, status: dict[str, str]) -> None:
+        """Replace the permission status, e.g. with the one recorded alongside a cached snapshot."""
+        self._last_snapshot_status = dict(status)
+
+    def _fetch_snapshot_collections(self, top: int, limitations: list) -> list[dict[str, Any]]:
+        """
+        Fetch SNAPSHOT_ENDPOINTS (up to top items each, $select-ed). The three first pages go out in one $batch
+        round trip; each collection's @odata.nextLink chain is then followed on its own worker thread (fetching
+        one page ahead) and reduced page by page with _SNAPSHOT_REDUCERS. Each result is the reducer's summary
+        on success, or {} with a message in limitations on failure (same as _safe_graph). If the $batch POST
+        itself fails, each collection is fetched directly.
+        Pages are min(top, 999) items and paging ends when Graph stops returning a nextLink, so a small tenant
+        costs one page per collection whatever top is; no $count pre-query is needed to right-size.
+        """
+        page_size = min(top, 999)
+        first_pages = [
+            {"id": str(i), "method": "GET", "url": f"/{endpoint}?$top={page_size}&$select={select}"}
+            for i, (endpoint, select) in enumerate(SNAPSHOT_ENDPOINTS)
+        ]
+        try:
+            responses: Optional[list[dict[str, Any]]] = self._batch(first_pages)
+        except GraphClientError:
+            responses = None
+
+        def collect(i: int) -> dict[str, Any]:
+            if responses is None:
+                endpoint, select = SNAPSHOT_ENDPOINTS[i]
+                first_page = self._first_page(endpoint, top, select=select)
+            else:
+                status = responses[i].get("status")
+                if status is None or not 200 <= status < 300:
+                    raise GraphClientError(f"Microsoft Graph request failed (HTTP {status}).", status_code=status)
+                first_page = responses[i].get("body") or {}
+            return _SNAPSHOT_REDUCERS[i](self._iter_pages_from(first_page, top, prefetch=True))
+
+        # Separate limitation lists keep messages in endpoint order regardless of thread timing.
+        per_endpoint: list[list[str]] = [[] for _ in SNAPSHOT_ENDPOINTS]
+        with ThreadPoolExecutor(max_workers=len(SNAPSHOT_ENDPOINTS)) as ex:
+            futures = [
+                ex.submit(_safe_graph, collect, i, default=None, limitations=per_endpoint[i])
+                for i in range(len(SNAPSHOT_ENDPOINTS))
+            ]
+            results = [f.result() for f in futures]
+        for messages in per_endpoint:
+            limitations.extend(messages)
+        return results
+
     def _build_intune_snapshot(
         self,
         limitations: Optional[list] = None,
         top: int = 10000,
     ) -> Optional[dict[str, Any]]:
         """
-        Fetch devices, apps, and configs via _safe_graph with pagination and return a structured snapshot.
+        Fetch devices, apps, and configs (one $batch for the first pages, then concurrent paging) and return a structured snapshot.
         Returns None if all three Graph calls fail (e.g. 403). Used by suggest-fixes, trend-summary, and copilot.
         Default top=10000 to capture large tenants (3k+ devices); pagination follows @odata.nextLink.
         """
         limitations = limitations if limitations is not None else []
-        devices_data = _safe_graph(
-            lambda: self.get_managed_devices(top=top),
-            default=None,
-            limitations=limitations,
-        )
-        apps_data = _safe_graph(
-            lambda: self.get_mobile_apps(top=top),
-            default=None,
-            limitations=limitations,
-        )
-        configs_data = _safe_graph(
-            lambda: self.get_device_configurations(top=top),
-            default=None,
-            limitations=limitations,
-        )
+        devices_data, apps_data, configs_data = self._fetch_snapshot_collections(top, limitations)
         if devices_data is None and apps_data is None and configs_data is None:
             return None
 
@@ -292,45 +675,25 @@ class GraphClient:
             "Device Configurations": "available" if configs_data else "denied",
         }
 
-        devices = (devices_data or {}).get("value") or []
-        apps = (apps_data or {}).get("value") or []
-        configs = (configs_data or {}).get("value") or []
-
-        compliant = non_compliant = unknown = 0
-        os_breakdown: dict[str, int] = {}
-        non_compliant_by_os: dict[str, int] = {}
-        for d in devices:
-            comp = (d.get("complianceState") or "unknown").lower()
-            os_name = d.get("operatingSystem") or "Unknown"
-            os_breakdown[os_name] = os_breakdown.get(os_name, 0) + 1
-            if comp == "compliant":
-                compliant += 1
-            elif comp == "noncompliant":
-                non_compliant += 1
-                non_compliant_by_os[os_name] = non_compliant_by_os.get(os_name, 0) + 1
-            else:
-                unknown += 1
-
-        app_type_breakdown: dict[str, int] = {}
-        for a in apps:
-            t = (a.get("@odata.type") or "unknown").replace("#microsoft.graph.", "")
-            app_type_breakdown[t] = app_type_breakdown.get(t, 0) + 1
-
-        config_policy_names = [c.get("displayName") or "" for c in configs if c.get("displayName")]
+        # A failed collection ({}) contributes the same zero counts as an empty one.
+        devices = devices_data or _reduce_devices(())
+        apps = apps_data or _reduce_apps(())
+        configs = configs_data or _reduce_configs(())
 
-        top_non_compliant_os = sorted(
-            non_compliant_by_os.items(), key=lambda x: -x[1]
-        )[:3]
+        compliant = devices["states"]["compliant"]
+        non_compliant = devices["states"]["noncompliant"]
+        # most_common(n) is a heapq.nlargest partial sort, not a full sort of every OS.
+        top_non_compliant_os = devices["non_compliant_by_os"].most_common(3)
 
         return {
-            "total_devices": len(devices),
+            "total_devices": devices["total"],
             "compliant": compliant,
             "non_compliant": non_compliant,
-            "unknown": unknown,
-            "os_breakdown": os_breakdown,
+            "unknown": devices["total"] - compliant - non_compliant,
+            "os_breakdown": dict(devices["os_breakdown"]),
             "top_non_compliant_os": [{"os": k, "count": v} for k, v in top_non_compliant_os],
-            "config_count": len(configs),
-            "config_policy_names": config_policy_names,
-            "app_count": len(apps),
-            "app_type_breakdown": app_type_breakdown,
+            "config_count": configs["total"],
+            "config_policy_names": configs["names"],
+            "app_count": apps["total"],
+            "app_type_breakdown": dict(apps["types"]),
         }
@@ -2,7 +2,7 @@
 
 import typer
 
-from app.commands import analyze, analyze_log, check_permissions, copilot, doc_intune, documentation, graph, log_analyzer, suggest_fixes, trend_summary
+from app.commands import analyze, analyze_log, check_permissions, copilot, doc_intune, documentation, graph, log_analyzer, report_pack, suggest_fixes, trend_summary
 
 app = typer.Typer(
     name="ai-it",
@@ -12,6 +12,7 @@ app = typer.Typer(
 app.add_typer(copilot.app, name="copilot")
 app.add_typer(suggest_fixes.app, name="suggest-fixes")
 app.add_typer(trend_summary.app, name="trend-summary")
+app.add_typer(report_pack.app, name="report-pack")
 app.add_typer(analyze_log.app, name="analyze-log")
 app.add_typer(check_permissions.app, name="check-permissions")
 app.command("log")(log_analyzer.log_cmd)
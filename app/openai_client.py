@@ -2,13 +2,32 @@
 
 Uses Azure OpenAI when AZURE_OPENAI_ENDPOINT is set in config; otherwise uses
 the standard OpenAI API. Model argument is the deployment name when using Azure.
+
+Responses are cached on disk (exact match on system prompt + user input + model) for
+OPENAI_RESPONSE_CACHE_TTL seconds, so re-running a command on unchanged data skips the
+API call entirely.
+
+AsyncOpenAIClient has the same interface with an awaitable generate_response, for
+commands that run several completions concurrently. OpenAIClient.stream_response yields
+text as it is generated, for commands that display the answer live.
 """
 
-from typing import Optional
+import abc
+import hashlib
+from typing import Any, Iterator, Optional
+
+import httpx
+from openai import AsyncAzureOpenAI, AsyncOpenAI, AzureOpenAI, OpenAI
+
+from app.config import AppConfig, get_config
+from app.util.disk_cache import DiskCache
 
-from openai import AzureOpenAI, OpenAI
 
-from app.config import get_config
+# Keep-alive pool for the SDK's httpx client. Completions can take minutes, so only connect is short.
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=10, max_connections=20)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+REQUEST_FAILED_MSG = "OpenAI / Azure OpenAI request failed. Check API key, endpoint, and network."
 
 
 class OpenAIClientError(Exception):
@@ -17,48 +36,163 @@ class OpenAIClientError(Exception):
     pass
 
 
-class OpenAIClient:
-    """Chat completions: Azure OpenAI if endpoint configured, else OpenAI."""
+class _ChatClientBase(abc.ABC):
+    """Config, model, and response-cache handling shared by the sync and async clients."""
 
     def __init__(self, model: Optional[str] = None) -> None:
         """Initialize from config. model is deployment name for Azure (default gpt-4o-mini)."""
         config = get_config()
         self._model = model if model is not None else config.azure_openai_deployment
+        self._cache = DiskCache("responses", config.response_cache_ttl) if config.response_cache_ttl > 0 else None
+        self._client = self._make_client(config)
+
+    @staticmethod
+    @abc.abstractmethod
+    def _make_client(config: AppConfig) -> Any:
+        """Create the SDK client for this config (sync or async, per subclass)."""
+
+    def _cache_key(self, system_prompt: str, user_input: str, instruction: Optional[str]) -> str:
+        """SHA-256 of the prompts and model; any change to any prompt is a miss."""
+        raw = f"{system_prompt}\0{user_input}\0{instruction or ''}\0{self._model}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_lookup(self, system_prompt: str, user_input: str, instruction: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+        """Return (key, cached text). key is None when the cache is disabled; cached text is None on a miss."""
+        if self._cache is None:
+            return None, None
+        key = self._cache_key(system_prompt, user_input, instruction)
+        cached = self._cache.get(key)
+        return key, cached if isinstance(cached, str) else None
+
+    @staticmethod
+    def _messages(system_prompt: str, user_input: str, instruction: Optional[str]) -> list[dict[str, str]]:
+        """System message, user input, then the optional trailing instruction."""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_input},
+        ]
+        if instruction:
+            messages.append({"role": "user", "content": instruction})
+        return messages
+
+    def _response_text(self, response: Any, key: Optional[str]) -> str:
+        """Extract stripped response text (empty string if none) and store non-empty text in the cache."""
+        choices = response.choices
+        if not choices:
+            return ""
+
+        message = choices[0].message
+        if message is None or message.content is None:
+            return ""
+
+        return self._store(message.content.strip(), key)
+
+    def _store(self, text: str, key: Optional[str]) -> str:
+        """Cache non-empty text under key (when caching is enabled); return text."""
+        if text and key is not None:
+            self._cache.set(key, text)
+        return text
 
+
+class OpenAIClient(_ChatClientBase):
+    """Chat completions: Azure OpenAI if endpoint configured, else OpenAI."""
+
+    @staticmethod
+    def _make_client(config: AppConfig) -> Any:
+        http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, follow_redirects=True)
         if config.azure_openai_endpoint:
-            self._client = AzureOpenAI(
+            return AzureOpenAI(
                 api_key=config.openai_api_key,
                 azure_endpoint=config.azure_openai_endpoint.rstrip("/"),
                 api_version=config.azure_openai_api_version,
+                http_client=http_client,
             )
-        else:
-            self._client = OpenAI(api_key=config.openai_api_key)
+        return OpenAI(api_key=config.openai_api_key, http_client=http_client)
 
-    def generate_response(self, system_prompt: str, user_input: str) -> str:
+    def generate_response(self, system_prompt: str, user_input: str, instruction: Optional[str] = None) -> str:
         """
         Call chat completions (OpenAI or Azure OpenAI) with system + user messages.
+        If instruction is given it is sent as a trailing user message after user_input. Commands that
+        share a system prompt and a large payload put the per-report text there, so the invariant
+        prefix (system + payload) is identical across calls and eligible for provider prompt caching.
         Returns response text only. Empty response returns empty string.
         Raises OpenAIClientError on SDK/network errors (no secrets in message).
+        Non-empty responses are served from / stored in the on-disk response cache when enabled.
         """
+        key, cached = self._cache_lookup(system_prompt, user_input, instruction)
+        if cached is not None:
+            return cached
+
         try:
             response = self._client.chat.completions.create(
-                model=self._model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input},
-                ],
+                model=self._model, messages=self._messages(system_prompt, user_input, instruction)
             )
         except Exception as e:
-            raise OpenAIClientError(
-                "OpenAI / Azure OpenAI request failed. Check API key, endpoint, and network."
-            ) from e
+            raise OpenAIClientError(REQUEST_FAILED_MSG) from e
 
-        choices = response.choices
-        if not choices:
-            return ""
+        return self._response_text(response, key)
 
-        message = choices[0].message
-        if message is None or message.content is None:
-            return ""
+    def stream_response(
+        self, system_prompt: str, user_input: str, instruction: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Same request as generate_response, but yield the text in pieces as the model produces them.
+        A cached response is yielded as a single piece. The full stripped text is cached once the
+        stream completes. Raises OpenAIClientError on SDK/network errors, including mid-stream.
+        """
+        key, cached = self._cache_lookup(system_prompt, user_input, instruction)
+        if cached is not None:
+            yield cached
+            return
+
+        parts: list[str] = []
+        try:
+            stream = self._client.chat.completions.create(
+                model=self._model, messages=self._messages(system_prompt, user_input, instruction), stream=True
+            )
+            for chunk in stream:
+                # Azure sends content-filter chunks with no choices; role/finish chunks have no content.
+                if not chunk.choices or not chunk.choices[0].delta or not chunk.choices[0].delta.content:
+                    continue
+                piece = chunk.choices[0].delta.content
+                parts.append(piece)
+                yield piece
+        except Exception as e:
+            raise OpenAIClientError(REQUEST_FAILED_MSG) from e
+
+        self._store("".join(parts).strip(), key)
+
+
+class AsyncOpenAIClient(_ChatClientBase):
+    """Async chat completions: Azure OpenAI if endpoint configured, else OpenAI. Same semantics as OpenAIClient."""
+
+    @staticmethod
+    def _make_client(config: AppConfig) -> Any:
+        http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, follow_redirects=True)
+        if config.azure_openai_endpoint:
+            return AsyncAzureOpenAI(
+                api_key=config.openai_api_key,
+                azure_endpoint=config.azure_openai_endpoint.rstrip("/"),
+                api_version=config.azure_openai_api_version,
+                http_client=http_client,
+            )
+        return AsyncOpenAI(api_key=config.openai_api_key, http_client=http_client)
+
+    async def generate_response(self, system_prompt: str, user_input: str, instruction: Optional[str] = None) -> str:
+        """Awaitable OpenAIClient.generate_response. Raises OpenAIClientError on SDK/network errors."""
+        key, cached = self._cache_lookup(system_prompt, user_input, instruction)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._client.chat.completions.create(
+                model=self._model, messages=self._messages(system_prompt, user_input, instruction)
+            )
+        except Exception as e:
+            raise OpenAIClientError(REQUEST_FAILED_MSG) from e
+
+        return self._response_text(response, key)
 
-        return message.content.strip() or ""
+    async def close(self) -> None:
+        """Close the underlying HTTP client (call before the event loop shuts down)."""
+        await self._client.close()
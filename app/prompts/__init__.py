@@ -0,0 +1 @@
+"""Prompt text files (*.txt) and the shared loader."""
@@ -0,0 +1,12 @@
+"""Load prompt text from app/prompts/{name}.txt, cached for the process lifetime."""
+
+import functools
+from pathlib import Path
+
+_PROMPTS_DIR = Path(__file__).resolve().parent
+
+
+@functools.lru_cache(maxsize=32)
+def load_prompt(name: str) -> str:
+    """Return the stripped contents of app/prompts/{name}.txt. Prompt files are static, so results are cached."""
+    return (_PROMPTS_DIR / f"{name}.txt").read_text(encoding="utf-8").strip()
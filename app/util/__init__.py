@@ -0,0 +1 @@
+"""Shared helpers used by command modules."""
@@ -0,0 +1,67 @@
+"""Small on-disk TTL cache: one JSON file per key under ~/.cache/it-copilot/<namespace>.
+
+Stdlib only. Files are written atomically with owner-only permissions because cached
+values (AI responses, Graph snapshots) can contain tenant data. Any I/O or decode
+error is treated as a miss: the cache must never make a command fail.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+
+def cache_root() -> Path:
+    """Base cache directory ($XDG_CACHE_HOME/it-copilot, default ~/.cache/it-copilot)."""
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "it-copilot"
+
+
+def write_private_file(path: Path, text: str) -> None:
+    """Atomically replace path with text, owner-only (dir 0700, file 0600). Raise OSError on failure."""
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")  # mkstemp creates the file 0600
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class DiskCache:
+    """Exact-match key/value cache with a fixed TTL (seconds). Keys must be filename-safe (e.g. hex digests)."""
+
+    def __init__(self, namespace: str, ttl: int) -> None:
+        self._dir = cache_root() / namespace
+        self._ttl = ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing, expired, or unreadable."""
+        hit = self.get_with_ttl(key)
+        return hit[0] if hit is not None else None
+
+    def get_with_ttl(self, key: str) -> Optional[tuple[Any, float]]:
+        """Return (cached value, seconds until it expires), or None if missing, expired, or unreadable."""
+        path = self._dir / f"{key}.json"
+        try:
+            with path.open("r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            remaining = entry["expires"] - time.time()
+            if remaining > 0:
+                return entry["value"], remaining
+            path.unlink(missing_ok=True)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value (must be JSON-serializable) for the cache TTL. Errors are ignored."""
+        try:
+            text = json.dumps({"expires": time.time() + self._ttl, "value": value})
+            write_private_file(self._dir / f"{key}.json", text)
+        except (OSError, TypeError, ValueError):
+            pass
@@ -0,0 +1,16 @@
+"""Bounded file reads for commands that only send the start of a file to the AI."""
+
+from pathlib import Path
+
+
+def read_head(path: Path, max_chars: int, note: str) -> str:
+    """
+    Read at most max_chars characters of a text file (UTF-8, undecodable bytes ignored).
+    If the file is longer, the result is the first max_chars characters plus note. Only
+    max_chars + 1 characters are ever read, so file size does not affect time or memory.
+    """
+    with path.open("r", encoding="utf-8", errors="ignore") as fh:
+        content = fh.read(max_chars + 1)
+    if len(content) > max_chars:
+        content = content[:max_chars] + note
+    return content
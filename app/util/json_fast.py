@@ -0,0 +1,28 @@
+"""Fast JSON serialization for AI payloads and parsing of Graph responses.
+
+Uses orjson when installed (C-accelerated, 5-6x faster than stdlib json on large
+Graph payloads); falls back to stdlib json otherwise. Output is a str either way.
+Output is compact: the LLM does not need indentation, and whitespace costs input tokens.
+"""
+
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+    import json
+
+
+def dumps_str(obj: Any) -> str:
+    """Serialize obj to compact JSON text. Non-JSON types (e.g. datetime) fall back to str()."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON from bytes (e.g. an HTTP response body). Raise ValueError on invalid JSON."""
+    if orjson is not None:
+        return orjson.loads(data)  # orjson.JSONDecodeError subclasses ValueError
+    return json.loads(data)
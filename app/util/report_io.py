@@ -0,0 +1,24 @@
+"""Timestamped report files under reports/ (relative to the working directory)."""
+
+import time
+from pathlib import Path
+
+REPORTS_DIR = Path("reports")
+
+_reports_ready = False
+
+
+def report_path(name: str) -> Path:
+    """Return reports/<name>_YYYYMMDD_HHMMSS.txt. Creates reports/ on first use in this process."""
+    global _reports_ready
+    if not _reports_ready:
+        REPORTS_DIR.mkdir(exist_ok=True)
+        _reports_ready = True
+    return REPORTS_DIR / f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.txt"
+
+
+def save_report(name: str, text: str) -> Path:
+    """Write text (UTF-8) to report_path(name) and return the path."""
+    out_path = report_path(name)
+    out_path.write_text(text, encoding="utf-8")
+    return out_path
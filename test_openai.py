@@ -1,20 +1,32 @@
-from openai import AzureOpenAI
-from dotenv import load_dotenv
+"""Manual Azure OpenAI smoke test: python test_openai.py. Importing this module makes no API call."""
+
+import functools
 import os
 
-load_dotenv()
 
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
-)
+@functools.lru_cache(maxsize=1)
+def _client():
+    from dotenv import load_dotenv
+    from openai import AzureOpenAI
+
+    load_dotenv()
+    return AzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+    )
+
+
+def main():
+    response = _client().chat.completions.create(
+        model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),  # your deployment name, e.g. "gpt-4o-mini"
+        messages=[
+            {"role": "user", "content": "Say hello"}
+        ]
+    )
+
+    print(response.choices[0].message.content)
 
-response = client.chat.completions.create(
-    model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),  # your deployment name, e.g. "gpt-4o-mini"
-    messages=[
-        {"role": "user", "content": "Say hello"}
-    ]
-)
 
-print(response.choices[0].message.content)
+if __name__ == "__main__":
+    main()
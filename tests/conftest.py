@@ -0,0 +1,9 @@
+"""Shared pytest setup.
+
+Imports app.graph_client (and with it msal and requests) once at collection start, so the cost is
+paid before the first test module is collected rather than attributed to it. Under pytest-xdist
+each worker is a fresh interpreter started by execnet, so every worker still does this once;
+multiprocessing start methods do not apply there.
+"""
+
+import app.graph_client  # noqa: F401
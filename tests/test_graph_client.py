@@ -2,18 +2,27 @@
 
 Covers:
 - GraphClient.__init__: validates required config fields.
-- GraphClient.get_access_token: success, MSAL exception, missing access_token.
-- GraphClient._request: success, network error, non-200 response, invalid JSON.
+- GraphClient.get_access_token: success, MSAL exception, missing access_token, token reuse until expiry, shared MSAL app, persisted token cache.
+- GraphClient._request: success, network error, non-200 response, invalid JSON, shared session, capped transport Retry-After.
 - GraphClient.get_organization: delegates to _request correctly.
 - GraphClient.get_users: delegates to _request with correct params.
+- GraphClient.probe_endpoints_batch / _batch: $batch status mapping, chunking, fallback, batch size limit, throttled retries.
+- GraphClient.iter_managed_devices / _iter_pages_from: lazy @odata.nextLink paging, max_items cap, prefetch.
+- GraphClient._build_intune_snapshot: first pages via $batch with $select, nextLink paging, 403 limitations, batch fallback, aggregation.
 
-No real network calls, no real tokens. Uses unittest.mock throughout.
+No real network calls, no real tokens. Patches go through pytest-mock's mocker fixture and are undone at test teardown.
 """
 
-from unittest.mock import MagicMock, patch, PropertyMock
+import copy
+import datetime as dt
+import json
+from types import SimpleNamespace
+from unittest.mock import ANY, MagicMock, PropertyMock
 import pytest
+import requests as _requests
+import time_machine
 
-from app.graph_client import GraphClient, GraphClientError, GRAPH_BASE_URL, GRAPH_SCOPE
+from app.graph_client import EndpointEntry, GraphClient, GraphClientError, GRAPH_BASE_URL, GRAPH_SCOPE
 
 
 # ---------------------------------------------------------------------------
@@ -32,12 +41,50 @@ VALID_CONFIG = {
 
 
 def _make_config(**overrides):
-    """Return a MagicMock mimicking AppConfig with optional field overrides."""
-    cfg = MagicMock()
-    data = {**VALID_CONFIG, **overrides}
-    for k, v in data.items():
-        setattr(cfg, k, v)
-    return cfg
+    """Return an attribute bag mimicking AppConfig with optional field overrides (unknown fields raise AttributeError)."""
+    return SimpleNamespace(**{**VALID_CONFIG, **overrides})
+
+
+@pytest.fixture(scope="module")
+def _module_graph_client():
+    """One GraphClient for the whole module, constructed once under a patched get_config."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.graph_client.get_config", _make_config)
+        yield GraphClient()
+
+
+@pytest.fixture
+def graph_client(_module_graph_client):
+    """
+    Shallow copy of the module client: no per-test construction, but attributes a test replaces
+    (_request, get_access_token) or the client caches (token, MSAL app) never leak into other tests.
+    """
+    return copy.copy(_module_graph_client)
+
+
+@pytest.fixture
+def mock_resp():
+    """HTTP 200 with an empty JSON object body; tests set status_code / content as needed."""
+    return MagicMock(status_code=200, content=b"{}")
+
+
+@pytest.fixture
+def mock_sleep(mocker):
+    """
+    Wall clock frozen at 2024-01-01 UTC and time.sleep in graph_client replaced by a mock (returned),
+    so retry/backoff paths run instantly and deterministically.
+    """
+    with time_machine.travel(dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc), tick=False):
+        yield mocker.patch("app.graph_client.time.sleep")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_msal_apps(tmp_path, monkeypatch, mocker):
+    """Each test starts with an empty MSAL app cache and a token cache under tmp_path (never ~/.cache)."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    mocker.patch.dict("app.graph_client._APP_CACHE", clear=True)
+    mocker.patch("app.graph_client._TOKEN_CACHE", None)
+    mocker.patch("app.graph_client.atexit.register")
 
 
 # ---------------------------------------------------------------------------
@@ -46,24 +93,19 @@ def _make_config(**overrides):
 
 
 class TestGraphClientInit:
-    def test_init_success(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
+    def test_init_success(self, mocker):
+        mocker.patch("app.graph_client.get_config", return_value=_make_config())
+        client = GraphClient()
         assert client._tenant_id == "tenant-123"
         assert client._client_id == "client-456"
         assert client._client_secret == "secret-789"
         assert client._base_url == GRAPH_BASE_URL
         assert client._app is None  # lazy, not created yet
 
-    @pytest.mark.parametrize(
-        "missing_field",
-        ["azure_tenant_id", "azure_client_id", "azure_client_secret"],
-    )
-    def test_init_raises_when_field_missing(self, missing_field):
-        with patch(
-            "app.graph_client.get_config",
-            return_value=_make_config(**{missing_field: ""}),
-        ):
+    def test_init_raises_when_field_missing(self, mocker):
+        mock_get_config = mocker.patch("app.graph_client.get_config")
+        for missing_field in ("azure_tenant_id", "azure_client_id", "azure_client_secret"):
+            mock_get_config.return_value = _make_config(**{missing_field: ""})
             with pytest.raises(GraphClientError, match="AZURE_TENANT_ID"):
                 GraphClient()
 
@@ -74,68 +116,125 @@ class TestGraphClientInit:
 
 
 class TestGetAccessToken:
-    def _client(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            return GraphClient()
-
-    def test_returns_token_on_success(self):
-        client = self._client()
+    def test_returns_token_on_success(self, graph_client, mocker):
         mock_app = MagicMock()
         mock_app.acquire_token_for_client.return_value = {"access_token": "tok-abc"}
 
-        with patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app):
-            token = client.get_access_token()
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        token = graph_client.get_access_token()
 
         assert token == "tok-abc"
         mock_app.acquire_token_for_client.assert_called_once_with(scopes=[GRAPH_SCOPE])
 
-    def test_raises_on_msal_exception(self):
-        client = self._client()
+    def test_raises_on_msal_exception(self, graph_client, mocker):
         mock_app = MagicMock()
         mock_app.acquire_token_for_client.side_effect = RuntimeError("boom")
 
-        with patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app):
-            with pytest.raises(GraphClientError, match="Failed to acquire"):
-                client.get_access_token()
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        with pytest.raises(GraphClientError, match="Failed to acquire"):
+            graph_client.get_access_token()
 
-    def test_raises_when_no_access_token_in_result(self):
-        client = self._client()
+    def test_raises_when_no_access_token_in_result(self, graph_client, mocker):
         mock_app = MagicMock()
         mock_app.acquire_token_for_client.return_value = {
             "error": "invalid_client",
             "error_description": "Bad credentials",
         }
 
-        with patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app):
-            with pytest.raises(GraphClientError, match="invalid_client"):
-                client.get_access_token()
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        with pytest.raises(GraphClientError, match="invalid_client"):
+            graph_client.get_access_token()
 
-    def test_error_description_excluded_when_contains_secret(self):
-        client = self._client()
+    def test_error_description_excluded_when_contains_secret(self, graph_client, mocker):
         mock_app = MagicMock()
         mock_app.acquire_token_for_client.return_value = {
             "error": "invalid_client",
             "error_description": "The secret provided is wrong.",
         }
 
-        with patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app):
-            with pytest.raises(GraphClientError) as exc_info:
-                client.get_access_token()
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        with pytest.raises(GraphClientError) as exc_info:
+            graph_client.get_access_token()
         # secret-containing description must not leak into message
         assert "secret provided" not in str(exc_info.value).lower()
 
-    def test_msal_app_is_reused(self):
+    def test_msal_app_is_reused(self, graph_client, mocker):
         """_get_app must be called only once across multiple token requests."""
-        client = self._client()
         mock_app = MagicMock()
         mock_app.acquire_token_for_client.return_value = {"access_token": "tok"}
 
-        with patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app) as mock_cls:
-            client.get_access_token()
-            client.get_access_token()
+        mock_cls = mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        graph_client.get_access_token()
+        graph_client.get_access_token()
 
         mock_cls.assert_called_once()  # MSAL app created only once
 
+    def test_msal_app_shared_across_clients(self, graph_client, mocker):
+        mock_app = MagicMock()
+        mock_app.acquire_token_for_client.return_value = {"access_token": "tok", "expires_in": 3600}
+
+        other_client = copy.copy(graph_client)
+
+        mock_cls = mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        graph_client.get_access_token()
+        other_client.get_access_token()
+
+        mock_cls.assert_called_once()
+        assert mock_cls.call_args.kwargs["instance_discovery"] is False
+
+    def test_token_cache_loaded_from_disk_and_saved_when_changed(self, graph_client, tmp_path, mocker):
+        from app.graph_client import TOKEN_CACHE_FILE, _save_token_cache
+        cache_file = tmp_path / "it-copilot" / TOKEN_CACHE_FILE
+        cache_file.parent.mkdir()
+        cache_file.write_text("{}", encoding="utf-8")
+
+        mock_cls = mocker.patch("app.graph_client.msal.ConfidentialClientApplication")
+        mock_register = mocker.patch("app.graph_client.atexit.register")
+        graph_client._get_app()
+
+        token_cache = mock_cls.call_args.kwargs["token_cache"]
+        mock_register.assert_called_once_with(_save_token_cache, token_cache, cache_file)
+
+        token_cache.has_state_changed = True
+        _save_token_cache(token_cache, cache_file)
+        assert cache_file.stat().st_mode & 0o777 == 0o600
+
+    def test_token_reused_until_expiry_margin(self, graph_client, mocker):
+        mock_app = MagicMock()
+        mock_app.acquire_token_for_client.return_value = {"access_token": "tok", "expires_in": 3600}
+
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        mocker.patch("app.graph_client.time.monotonic", return_value=1000.0)
+        assert graph_client.get_access_token() == "tok"
+        assert graph_client.get_access_token() == "tok"
+
+        mock_app.acquire_token_for_client.assert_called_once()
+
+    def test_token_refetched_after_expiry(self, graph_client, mocker):
+        mock_app = MagicMock()
+        mock_app.acquire_token_for_client.side_effect = [
+            {"access_token": "tok-1", "expires_in": 3600},
+            {"access_token": "tok-2", "expires_in": 3600},
+        ]
+
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        mock_clock = mocker.patch("app.graph_client.time.monotonic", return_value=0.0)
+        assert graph_client.get_access_token() == "tok-1"
+        mock_clock.return_value = 3541.0  # 3600s lifetime minus the 60s margin has passed
+        assert graph_client.get_access_token() == "tok-2"
+
+    def test_concurrent_callers_share_one_acquisition(self, graph_client, mocker):
+        from concurrent.futures import ThreadPoolExecutor
+        mock_app = MagicMock()
+        mock_app.acquire_token_for_client.return_value = {"access_token": "tok", "expires_in": 3600}
+
+        mocker.patch("app.graph_client.msal.ConfidentialClientApplication", return_value=mock_app)
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            tokens = list(ex.map(lambda _: graph_client.get_access_token(), range(16)))
+
+        assert tokens == ["tok"] * 16
+        mock_app.acquire_token_for_client.assert_called_once()
+
 
 # ---------------------------------------------------------------------------
 # _request
@@ -143,82 +242,86 @@ class TestGetAccessToken:
 
 
 class TestRequest:
-    def _client_with_token(self, token="test-token"):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
-        client.get_access_token = MagicMock(return_value=token)
-        return client
-
-    def _mock_response(self, status_code=200, json_data=None, raise_json=False):
-        resp = MagicMock()
-        resp.status_code = status_code
-        if raise_json:
-            resp.json.side_effect = ValueError("bad json")
-        else:
-            resp.json.return_value = json_data or {}
-        return resp
-
-    def test_success_returns_json(self):
-        client = self._client_with_token()
+    @pytest.fixture
+    def client(self, graph_client):
+        """Module client with a fixed access token."""
+        graph_client.get_access_token = lambda: "test-token"
+        return graph_client
+
+    def test_success_returns_json(self, client, mocker, mock_resp):
         payload = {"value": [{"id": "org-1"}]}
+        mock_resp.content = json.dumps(payload).encode()
 
-        with patch("app.graph_client.requests.request", return_value=self._mock_response(200, payload)) as mock_req:
-            result = client._request("GET", "organization")
+        mock_req = mocker.patch.object(client._session, "request", autospec=True, return_value=mock_resp)
+        result = client._request("GET", "organization")
 
         assert result == payload
-        mock_req.assert_called_once()
-        call_kwargs = mock_req.call_args
-        assert call_kwargs.args[0] == "GET"
-        assert "organization" in call_kwargs.args[1]
-        assert call_kwargs.kwargs["headers"]["Authorization"] == "Bearer test-token"
-        assert call_kwargs.kwargs["timeout"] == 30
+        mock_req.assert_called_once_with(
+            "GET",
+            f"{GRAPH_BASE_URL}/organization",
+            headers={"Authorization": "Bearer test-token"},
+            params=None,
+            json=None,
+            timeout=30,
+        )
+
+    def test_raises_on_network_error(self, client, mocker):
+        mocker.patch.object(client._session, "request", autospec=True, side_effect=_requests.RequestException("timeout"))
+        with pytest.raises(GraphClientError, match="network or timeout"):
+            client._request("GET", "organization")
 
-    def test_raises_on_network_error(self):
-        import requests as req_lib
-        client = self._client_with_token()
+    def test_raises_on_non_200_response(self, client, mocker, mock_resp):
+        mock_resp.status_code = 403
+        mocker.patch.object(client._session, "request", autospec=True, return_value=mock_resp)
+        with pytest.raises(GraphClientError, match="HTTP 403"):
+            client._request("GET", "organization")
 
-        with patch("app.graph_client.requests.request", side_effect=req_lib.RequestException("timeout")):
-            with pytest.raises(GraphClientError, match="network or timeout"):
-                client._request("GET", "organization")
+    def test_raises_on_invalid_json(self, client, mocker, mock_resp):
+        mock_resp.content = b"not json"
+        mocker.patch.object(client._session, "request", autospec=True, return_value=mock_resp)
+        with pytest.raises(GraphClientError, match="invalid JSON"):
+            client._request("GET", "organization")
 
-    def test_raises_on_non_200_response(self):
-        client = self._client_with_token()
+    def test_raises_when_token_acquisition_fails(self, graph_client):
+        graph_client.get_access_token = MagicMock(side_effect=GraphClientError("no token"))
 
-        with patch("app.graph_client.requests.request", return_value=self._mock_response(403)):
-            with pytest.raises(GraphClientError, match="HTTP 403"):
-                client._request("GET", "organization")
+        with pytest.raises(GraphClientError, match="no token"):
+            graph_client._request("GET", "organization")
 
-    def test_raises_on_invalid_json(self):
-        client = self._client_with_token()
+    def test_url_built_correctly(self, client, mocker, mock_resp):
+        mock_req = mocker.patch.object(client._session, "request", autospec=True, return_value=mock_resp)
+        client._request("GET", "/users")
 
-        with patch("app.graph_client.requests.request", return_value=self._mock_response(200, raise_json=True)):
-            with pytest.raises(GraphClientError, match="invalid JSON"):
-                client._request("GET", "organization")
+        mock_req.assert_called_once_with(
+            "GET", "https://graph.microsoft.com/v1.0/users", headers=ANY, params=None, json=None, timeout=ANY
+        )
 
-    def test_raises_when_token_acquisition_fails(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
-        client.get_access_token = MagicMock(side_effect=GraphClientError("no token"))
+    def test_params_forwarded(self, client, mocker, mock_resp):
+        mock_req = mocker.patch.object(client._session, "request", autospec=True, return_value=mock_resp)
+        client._request("GET", "users", params={"$top": 5})
 
-        with pytest.raises(GraphClientError, match="no token"):
-            client._request("GET", "organization")
+        mock_req.assert_called_once_with("GET", ANY, headers=ANY, params={"$top": 5}, json=None, timeout=ANY)
 
-    def test_url_built_correctly(self):
-        client = self._client_with_token()
+    def test_requests_reuse_one_session(self, client, mocker, mock_resp):
+        mock_req = mocker.patch.object(client._session, "request", autospec=True, return_value=mock_resp)
+        client._request("GET", "organization")
+        client._request("GET", "users")
 
-        with patch("app.graph_client.requests.request", return_value=self._mock_response(200, {})) as mock_req:
-            client._request("GET", "/users")
+        assert mock_req.call_count == 2
 
-        url = mock_req.call_args.args[1]
-        assert url == "https://graph.microsoft.com/v1.0/users"
+    def test_transport_retry_after_capped(self):
+        from app.graph_client import HTTP_RETRY, MAX_RETRY_AFTER
+        retry = HTTP_RETRY.increment(method="GET", url="/users", response=MagicMock(status=429, headers={"Retry-After": "600"}))
 
-    def test_params_forwarded(self):
-        client = self._client_with_token()
+        assert retry.get_retry_after(MagicMock(headers={"Retry-After": "600"})) == MAX_RETRY_AFTER
+        assert retry.get_retry_after(MagicMock(headers={"Retry-After": "5"})) == 5
+        assert retry.get_retry_after(MagicMock(headers={})) is None
 
-        with patch("app.graph_client.requests.request", return_value=self._mock_response(200, {})) as mock_req:
-            client._request("GET", "users", params={"$top": 5})
-
-        assert mock_req.call_args.kwargs["params"] == {"$top": 5}
+    def test_context_manager_closes_session(self, graph_client, mocker):
+        mock_close = mocker.patch.object(graph_client._session, "close")
+        with graph_client as entered:
+            assert entered is graph_client
+        mock_close.assert_called_once()
 
 
 # ---------------------------------------------------------------------------
@@ -227,22 +330,18 @@ class TestRequest:
 
 
 class TestGetOrganization:
-    def test_returns_dict(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
-        client._request = MagicMock(return_value={"id": "org-1", "displayName": "Contoso"})
+    def test_returns_dict(self, graph_client):
+        graph_client._request = MagicMock(return_value={"id": "org-1", "displayName": "Contoso"})
 
-        result = client.get_organization()
+        result = graph_client.get_organization()
 
-        client._request.assert_called_once_with("GET", "organization")
+        graph_client._request.assert_called_once_with("GET", "organization")
         assert result == {"id": "org-1", "displayName": "Contoso"}
 
-    def test_returns_empty_dict_on_non_dict_response(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
-        client._request = MagicMock(return_value=[1, 2, 3])  # unexpected list
+    def test_returns_empty_dict_on_non_dict_response(self, graph_client):
+        graph_client._request = lambda *args, **kwargs: [1, 2, 3]  # unexpected list
 
-        result = client.get_organization()
+        result = graph_client.get_organization()
         assert result == {}
 
 
@@ -252,30 +351,289 @@ class TestGetOrganization:
 
 
 class TestGetUsers:
-    def test_returns_dict_with_default_top(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
+    def test_returns_dict_with_default_top(self, graph_client):
         payload = {"value": [{"id": "u1"}, {"id": "u2"}]}
-        client._request = MagicMock(return_value=payload)
+        graph_client._request = MagicMock(return_value=payload)
 
-        result = client.get_users()
+        result = graph_client.get_users()
 
-        client._request.assert_called_once_with("GET", "users", params={"$top": 10})
+        graph_client._request.assert_called_once_with("GET", "users", params={"$top": 10})
         assert result == payload
 
-    def test_returns_dict_with_custom_top(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
-        client._request = MagicMock(return_value={"value": []})
+    def test_returns_dict_with_custom_top(self, graph_client):
+        graph_client._request = MagicMock(return_value={"value": []})
 
-        client.get_users(top=25)
+        graph_client.get_users(top=25)
 
-        client._request.assert_called_once_with("GET", "users", params={"$top": 25})
+        graph_client._request.assert_called_once_with("GET", "users", params={"$top": 25})
 
-    def test_returns_empty_dict_on_non_dict_response(self):
-        with patch("app.graph_client.get_config", return_value=_make_config()):
-            client = GraphClient()
-        client._request = MagicMock(return_value="unexpected string")
+    def test_returns_empty_dict_on_non_dict_response(self, graph_client):
+        graph_client._request = lambda *args, **kwargs: "unexpected string"
 
-        result = client.get_users()
+        result = graph_client.get_users()
         assert result == {}
+
+
+# ---------------------------------------------------------------------------
+# probe_endpoints_batch
+# ---------------------------------------------------------------------------
+
+
+class TestProbeEndpointsBatch:
+    def test_maps_batch_statuses(self, graph_client):
+        entries = [
+            EndpointEntry("A", "users", True, params={"$top": 1}),
+            EndpointEntry("B", "groups", False, params={"$top": 1}),
+            EndpointEntry("C", "missing", True),
+            EndpointEntry("D", "broken", True),
+        ]
+        # Responses may arrive out of order; they are matched back by id.
+        graph_client._request = MagicMock(return_value={"responses": [
+            {"id": "3", "status": 500},
+            {"id": "0", "status": 200},
+            {"id": "2", "status": 404},
+            {"id": "1", "status": 403},
+        ]})
+
+        results = graph_client.probe_endpoints_batch(entries)
+
+        assert results == [
+            ("Available", "Granted"),
+            ("Denied", "Future scope"),
+            ("Available", "No data"),
+            ("Error", "Error: Microsoft Graph request failed (HTTP 500)."),
+        ]
+        method, endpoint = graph_client._request.call_args.args
+        assert (method, endpoint) == ("POST", "$batch")
+        sub = graph_client._request.call_args.kwargs["json_body"]["requests"][0]
+        assert sub == {"id": "0", "method": "GET", "url": "/users?$top=1"}
+
+    def test_post_entries_carry_body_and_content_type(self, graph_client):
+        entry = EndpointEntry("R", "deviceManagement/reports/x", True, method="POST", json_body={})
+        graph_client._request = MagicMock(return_value={"responses": [{"id": "0", "status": 200}]})
+
+        graph_client.probe_endpoints_batch([entry])
+
+        sub = graph_client._request.call_args.kwargs["json_body"]["requests"][0]
+        assert sub["body"] == {}
+        assert sub["headers"] == {"Content-Type": "application/json"}
+
+    def test_chunks_into_batches_of_twenty(self, graph_client):
+        entries = [EndpointEntry(str(i), f"e{i}", True) for i in range(25)]
+
+        def fake_request(method, endpoint, json_body=None, **kwargs):
+            return {"responses": [{"id": r["id"], "status": 200} for r in json_body["requests"]]}
+
+        graph_client._request = MagicMock(side_effect=fake_request)
+
+        results = graph_client.probe_endpoints_batch(entries)
+
+        assert len(results) == 25
+        assert graph_client._request.call_count == 2
+
+    def test_falls_back_to_single_probes_when_batch_fails(self, graph_client):
+        entries = [EndpointEntry("A", "users", True)]
+        graph_client._request = MagicMock(side_effect=[GraphClientError("boom", status_code=400), {}])
+
+        results = graph_client.probe_endpoints_batch(entries)
+
+        assert results == [("Available", "Granted")]
+        assert graph_client._request.call_args.args == ("GET", f"{GRAPH_BASE_URL}/users")
+
+    def test_entry_urls_precomputed(self):
+        entry = EndpointEntry("Users", "/users", False, params={"$top": 1})
+
+        assert entry.url == f"{GRAPH_BASE_URL}/users"
+        assert entry.batch_url == "/users?$top=1"
+        with pytest.raises(AttributeError):
+            entry.url = "https://example.invalid"
+
+    def test_batch_rejects_more_than_twenty_requests(self, graph_client):
+        graph_client._request = MagicMock()
+
+        with pytest.raises(ValueError, match="at most 20"):
+            graph_client._batch([{"id": str(i), "method": "GET", "url": "/users"} for i in range(21)])
+        graph_client._request.assert_not_called()
+
+    def test_batch_retries_throttled_sub_requests_after_retry_after(self, graph_client, mock_sleep):
+        graph_client._request = MagicMock(side_effect=[
+            {"responses": [
+                {"id": "0", "status": 200},
+                {"id": "1", "status": 429, "headers": {"Retry-After": "5"}},
+            ]},
+            {"responses": [{"id": "1", "status": 200}]},
+        ])
+
+        responses = graph_client._batch([{"id": "0", "method": "GET", "url": "/a"}, {"id": "1", "method": "GET", "url": "/b"}])
+
+        assert [r["status"] for r in responses] == [200, 200]
+        mock_sleep.assert_called_once_with(5.0)
+        retried = graph_client._request.call_args_list[1].kwargs["json_body"]["requests"]
+        assert [r["id"] for r in retried] == ["1"]
+
+    def test_batch_returns_throttled_response_when_retries_exhausted(self, graph_client, mock_sleep):
+        graph_client._request = MagicMock(return_value={"responses": [{"id": "0", "status": 503}]})
+
+        responses = graph_client._batch([{"id": "0", "method": "GET", "url": "/a"}])
+
+        assert responses == [{"id": "0", "status": 503}]
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 2.0, 4.0]  # no Retry-After: backoff
+        assert graph_client._request.call_count == 4
+
+    def test_batch_missing_sub_response_has_no_status(self, graph_client):
+        graph_client._request = lambda *args, **kwargs: {"responses": [{"id": "0", "status": 200}]}
+
+        responses = graph_client._batch([{"id": "0", "method": "GET", "url": "/a"}, {"id": "1", "method": "GET", "url": "/b"}])
+
+        assert responses == [{"id": "0", "status": 200}, {"id": "1", "status": None}]
+
+
+# ---------------------------------------------------------------------------
+# iter_managed_devices / _iter_paginated
+# ---------------------------------------------------------------------------
+
+
+class TestIterManagedDevices:
+    def test_follows_next_link_until_exhausted(self, graph_client):
+        graph_client._request = MagicMock(side_effect=[
+            {"value": [{"id": "d1"}, {"id": "d2"}], "@odata.nextLink": "https://next/page2"},
+            {"value": [{"id": "d3"}]},
+        ])
+
+        ids = [d["id"] for d in graph_client.iter_managed_devices()]
+
+        assert ids == ["d1", "d2", "d3"]
+        assert graph_client._request.call_args_list[0].args == ("GET", "deviceManagement/managedDevices")
+        assert graph_client._request.call_args_list[0].kwargs == {"params": {"$top": 999}}
+        assert graph_client._request.call_args_list[1].args == ("GET", "https://next/page2")
+
+    def test_stops_at_top_without_fetching_more_pages(self, graph_client):
+        graph_client._request = MagicMock(return_value={"value": [{"id": "d1"}, {"id": "d2"}], "@odata.nextLink": "https://next"})
+
+        ids = [d["id"] for d in graph_client.iter_managed_devices(top=2)]
+
+        assert ids == ["d1", "d2"]
+        graph_client._request.assert_called_once_with("GET", "deviceManagement/managedDevices", params={"$top": 2})
+
+    def test_consumer_break_skips_remaining_pages(self, graph_client):
+        graph_client._request = MagicMock(return_value={"value": [{"id": "d1"}], "@odata.nextLink": "https://next"})
+
+        for _ in graph_client.iter_managed_devices():
+            break
+
+        graph_client._request.assert_called_once()
+
+    def test_prefetch_requests_next_page_while_current_is_processed(self, graph_client):
+        import threading
+        fetched = threading.Event()
+
+        def fake_request(method, endpoint, **kwargs):
+            fetched.set()
+            return {"value": [{"id": "d2"}]}
+
+        graph_client._request = MagicMock(side_effect=fake_request)
+        pages = graph_client._iter_pages_from({"value": [{"id": "d1"}], "@odata.nextLink": "https://next"}, None, prefetch=True)
+
+        assert next(pages) == [{"id": "d1"}]
+        assert fetched.wait(timeout=2)  # page 2 requested before the consumer asked for it
+        assert list(pages) == [[{"id": "d2"}]]
+        graph_client._request.assert_called_once_with("GET", "https://next")
+
+
+# ---------------------------------------------------------------------------
+# _build_intune_snapshot
+# ---------------------------------------------------------------------------
+
+
+class TestBuildIntuneSnapshot:
+    def test_first_pages_batched_then_next_links_followed(self, graph_client):
+        def fake_request(method, endpoint, params=None, json_body=None):
+            if endpoint == "$batch":
+                return {"responses": [
+                    {"id": "0", "status": 200, "body": {
+                        "value": [{"complianceState": "compliant", "operatingSystem": "Windows"}],
+                        "@odata.nextLink": "https://next/devices2",
+                    }},
+                    {"id": "1", "status": 200, "body": {"value": [{"@odata.type": "#microsoft.graph.win32LobApp"}]}},
+                    {"id": "2", "status": 200, "body": {"value": [{"displayName": "Baseline"}]}},
+                ]}
+            assert endpoint == "https://next/devices2"
+            return {"value": [{"complianceState": "noncompliant", "operatingSystem": "iOS"}]}
+
+        graph_client._request = MagicMock(side_effect=fake_request)
+        limitations = []
+
+        snapshot = graph_client._build_intune_snapshot(limitations=limitations, top=5000)
+
+        assert snapshot["total_devices"] == 2
+        assert snapshot["compliant"] == 1 and snapshot["non_compliant"] == 1
+        assert snapshot["app_type_breakdown"] == {"win32LobApp": 1}
+        assert snapshot["config_policy_names"] == ["Baseline"]
+        assert limitations == []
+        batch_call = graph_client._request.call_args_list[0]
+        urls = [r["url"] for r in batch_call.kwargs["json_body"]["requests"]]
+        assert urls == [
+            "/deviceManagement/managedDevices?$top=999&$select=id,complianceState,operatingSystem",
+            "/deviceAppManagement/mobileApps?$top=999&$select=id",
+            "/deviceManagement/deviceConfigurations?$top=999&$select=id,displayName",
+        ]
+        assert graph_client._request.call_count == 2
+
+    def test_denied_sub_response_recorded_as_limitation(self, graph_client):
+        graph_client._request = lambda *args, **kwargs: {"responses": [
+            {"id": "0", "status": 200, "body": {"value": [{"complianceState": "compliant"}]}},
+            {"id": "1", "status": 403, "body": {"error": {}}},
+            {"id": "2", "status": 200, "body": {"value": []}},
+        ]}
+        limitations = []
+
+        snapshot = graph_client._build_intune_snapshot(limitations=limitations, top=10)
+
+        assert snapshot["total_devices"] == 1
+        assert snapshot["app_count"] == 0
+        assert limitations == ["Permission-limited: request returned 403"]
+        assert graph_client.get_permission_status()["Mobile Apps"] == "denied"
+
+    def test_falls_back_to_direct_requests_when_batch_fails(self, graph_client):
+        def fake_request(method, endpoint, params=None, json_body=None):
+            if endpoint == "$batch":
+                raise GraphClientError("Microsoft Graph request failed (HTTP 400).", status_code=400)
+            return {"value": [{"id": endpoint}]}
+
+        graph_client._request = MagicMock(side_effect=fake_request)
+
+        snapshot = graph_client._build_intune_snapshot(limitations=[], top=10)
+
+        assert snapshot["total_devices"] == 1
+        assert snapshot["app_count"] == 1
+        assert snapshot["config_count"] == 1
+        assert graph_client._request.call_count == 4
+        params = [c.kwargs["params"] for c in graph_client._request.call_args_list[1:]]
+        assert {"$top": 10, "$select": "id,complianceState,operatingSystem"} in params
+
+    def test_aggregates_compliance_os_and_app_types(self, graph_client):
+        devices = [
+            {"complianceState": "compliant", "operatingSystem": "Windows"},
+            {"complianceState": "noncompliant", "operatingSystem": "iOS"},
+            {"complianceState": "NonCompliant", "operatingSystem": "Windows"},
+            {"complianceState": "noncompliant", "operatingSystem": "iOS"},
+            {"complianceState": None},
+            {"complianceState": "inGracePeriod", "operatingSystem": "Android"},
+        ]
+        apps = [{"@odata.type": "#microsoft.graph.win32LobApp"}, {}, {"@odata.type": "#microsoft.graph.win32LobApp"}]
+        # Devices span two pages; counts are folded across pages.
+        graph_client._request = MagicMock(side_effect=[
+            {"responses": [
+                {"id": "0", "status": 200, "body": {"value": devices[:4], "@odata.nextLink": "https://next/devices2"}},
+                {"id": "1", "status": 200, "body": {"value": apps}},
+                {"id": "2", "status": 200, "body": {"value": []}},
+            ]},
+            {"value": devices[4:]},
+        ])
+
+        snapshot = graph_client._build_intune_snapshot(top=10)
+
+        assert (snapshot["compliant"], snapshot["non_compliant"], snapshot["unknown"]) == (1, 3, 2)
+        assert snapshot["os_breakdown"] == {"Windows": 2, "iOS": 2, "Unknown": 1, "Android": 1}
+        assert snapshot["top_non_compliant_os"] == [{"os": "iOS", "count": 2}, {"os": "Windows", "count": 1}]
+        assert snapshot["app_type_breakdown"] == {"win32LobApp": 2, "unknown": 1}